@@ -1,10 +1,27 @@
+import argparse
+import collections
+import html.parser
+import http.server
 import json
+import math
+import multiprocessing
+import os
+import socket
+import threading
 import time
 import urllib
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from itertools import repeat
 
 import jwt
 import requests
-from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from requests.adapters import HTTPAdapter
 
 MOCKSERVER_URL = "http://mockserver:1080"
 LOGIN_REDIRECT_URL = "http://localhost:7777/cb"
@@ -14,48 +31,349 @@ CREDENTIAL_ISSUER = None
 CREDENTIAL_ISSUER_DID = None
 CREDENTIAL_CONFIGURATION_ID = "UniversityDegreeCredential"
 AUTHORIZATION_SERVER = "http://external-keycloak-issuer:8080/realms/students"
+SCHEMA_NAME = "UniversityDegree"
+SCHEMA_VERSION = "1.0.0"
+# IDs of the issuer resources, reused by the next runs
+ISSUER_STATE_FILE = os.environ.get("ISSUER_STATE_FILE", "issuer-state.json")
 
 ALICE_CLIENT_ID = "alice-wallet"
+ALICE_USERNAME = "alice"
+ALICE_PASSWORD = "1234"
+
+# Keycloak advertises its front-channel URLs on localhost:9980, the host port,
+# headless logins from the compose network are sent to this origin instead
+AUTHORIZATION_SERVER_INTERNAL_ORIGIN = os.environ.get(
+    "AUTHORIZATION_SERVER_INTERNAL_ORIGIN", "http://external-keycloak-issuer:8080"
+)
 
 HOLDER_LONG_FORM_DID = "did:prism:73196107e806b084d44339c847a3ae8dd279562f23895583f62cc91a2ee5b8fe:CnsKeRI8CghtYXN0ZXItMBABSi4KCXNlY3AyNTZrMRIhArrplJNfQYxthryRU87XdODy-YWUh5mqrvIfAdoZFeJBEjkKBWtleS0wEAJKLgoJc2VjcDI1NmsxEiEC8rsFplfYvRLazdWWi3LNR1gaAQXb-adVhZacJT4ntwE"
 HOLDER_ASSERTION_PRIVATE_KEY_HEX = (
     "2902637d412190fb08f5d0e0b2efc1eefae8060ae151e7951b69afbecbdd452e"
 )
 
+# proof-of-possession keys by JWT algorithm: key id and private key hex
+# EdDSA signs faster but needs a holder DID with an Ed25519 key, e.g.
+# HOLDER_EDDSA_KID=did:prism:...#key-1 HOLDER_EDDSA_PRIVATE_KEY_HEX=...
+HOLDER_KEYS = {
+    "ES256K": (HOLDER_LONG_FORM_DID + "#key-0", HOLDER_ASSERTION_PRIVATE_KEY_HEX),
+}
+if os.environ.get("HOLDER_EDDSA_KID") and os.environ.get(
+    "HOLDER_EDDSA_PRIVATE_KEY_HEX"
+):
+    HOLDER_KEYS["EdDSA"] = (
+        os.environ["HOLDER_EDDSA_KID"],
+        os.environ["HOLDER_EDDSA_PRIVATE_KEY_HEX"],
+    )
+HOLDER_PROOF_ALG = os.environ.get("HOLDER_PROOF_ALG", "ES256K")
+
+# connections kept alive per host, and number of hosts with a pool
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "64"))
+HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "8"))
+# wait for a free connection instead of opening one that is not reused
+HTTP_POOL_BLOCK = os.environ.get("HTTP_POOL_BLOCK", "true").lower() == "true"
+
+
+def create_http_session(
+    pool_size: int = HTTP_POOL_SIZE,
+    pool_hosts: int = HTTP_POOL_HOSTS,
+    pool_block: bool = HTTP_POOL_BLOCK,
+) -> requests.Session:
+    """
+    Create an HTTP session reusing keep-alive connections across calls
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_hosts, pool_maxsize=pool_size, pool_block=pool_block
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+http_session = create_http_session()
+
+# local server receiving agent events, the agent must be able to reach it
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "9955"))
+WEBHOOK_HOST = os.environ.get("WEBHOOK_HOST", socket.gethostname())
+
+
+class WebhookReceiver:
+    """
+    Receive agent events on a local HTTP server, so that waits for a state
+    change wake up as soon as the agent notifies it
+    Without events, waits fall back to polling with exponential backoff
+    """
+
+    def __init__(self, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT):
+        self.host = host
+        self.port = port
+        self.webhook_id = None
+        self._events = collections.deque(maxlen=1000)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def running(self) -> bool:
+        return self._server is not None
+
+    def start(self):
+        receiver = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    receiver.publish(json.loads(self.rfile.read(length)))
+                except ValueError:
+                    pass
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                # authorization redirects forwarded by mockserver
+                url = urllib.parse.urlsplit(self.path)
+                code = urllib.parse.parse_qs(url.query).get("code")
+                if url.path == "/cb" and code:
+                    receiver.publish(
+                        {"type": "AuthorizationRedirect", "data": {"code": code[0]}}
+                    )
+                body = b"Login Successful"
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = http.server.ThreadingHTTPServer(
+                ("0.0.0.0", self.port), Handler
+            )
+        except OSError as e:
+            print(f"webhook receiver not started, falling back to polling: {e}")
+            return
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        try:
+            response = http_session.post(
+                f"{AGENT_URL}/events/webhooks", json={"url": self.url}
+            )
+            response.raise_for_status()
+            self.webhook_id = response.json()["id"]
+        except requests.RequestException as e:
+            print(f"webhook registration failed, falling back to polling: {e}")
+
+    def stop(self):
+        if self.webhook_id:
+            # runs in a finally clause, must not hide the original error
+            try:
+                http_session.delete(f"{AGENT_URL}/events/webhooks/{self.webhook_id}")
+            except requests.RequestException as e:
+                print(f"webhook unregistration failed: {e}")
+            self.webhook_id = None
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def publish(self, event):
+        with self._condition:
+            self._seq += 1
+            self._events.append((self._seq, event))
+            self._condition.notify_all()
+
+    def mark(self) -> int:
+        """
+        Sequence number of the last event, to wait for later ones only
+        """
+        with self._condition:
+            return self._seq
+
+    def wait_for(self, matches, since: int, timeout: float):
+        """
+        Wait for an event received after `since` and accepted by `matches`
+        """
+
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                for seq, event in self._events:
+                    if seq > since and matches(event):
+                        return event
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+
+webhooks = WebhookReceiver()
+
+
+def wait_until(fetch_state, is_done, matches, timeout: float = 300.0):
+    """
+    Fetch a state until `is_done` accepts it
+    It is fetched again as soon as an event accepted by `matches` arrives,
+    or after an exponential backoff from 0.1s to 5s when none does
+    """
+
+    delay = 0.1
+    deadline = time.monotonic() + timeout
+    while True:
+        since = webhooks.mark()
+        state = fetch_state()
+        if is_done(state):
+            return state
+        if time.monotonic() > deadline:
+            raise TimeoutError("state did not change in time")
+        if not webhooks.wait_for(matches, since, delay):
+            delay = min(delay * 2, 5.0)
+
+
+def event_of_type(event_type: str, **data):
+    def matches(event):
+        return event.get("type") == event_type and all(
+            event.get("data", {}).get(key) == value for key, value in data.items()
+        )
+
+    return matches
+
+
+def wait_credential_record(record_id: str, states, timeout: float = 300.0):
+    """
+    Wait for an issue-credential record to reach one of `states`
+    """
+
+    return wait_until(
+        lambda: http_session.get(
+            f"{AGENT_URL}/issue-credentials/records/{record_id}"
+        ).json(),
+        lambda record: record["protocolState"] in states,
+        event_of_type("IssueCredentialRecordUpdated", recordId=record_id),
+        timeout,
+    )
+
+
+def wait_presentation(presentation_id: str, states, timeout: float = 300.0):
+    """
+    Wait for a present-proof presentation to reach one of `states`
+    """
+
+    return wait_until(
+        lambda: http_session.get(
+            f"{AGENT_URL}/present-proof/presentations/{presentation_id}"
+        ).json(),
+        lambda presentation: presentation["status"] in states,
+        event_of_type("PresentationUpdated", presentationId=presentation_id),
+        timeout,
+    )
+
+
+def iter_paginated(
+    url: str, params: dict = None, page_size: int = 100, prefetch: bool = False
+):
+    """
+    Lazily iterate over the items of an offset/limit paginated agent endpoint
+    Pages are requested when the previous one is consumed, or with prefetch,
+    while it is consumed, for callers reading through all the pages
+    """
+
+    def fetch_page(offset: int):
+        response = http_session.get(
+            url, params={**(params or {}), "offset": offset, "limit": page_size}
+        )
+        response.raise_for_status()
+        return response.json()["contents"]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        offset = 0
+        page = fetch_page(offset)
+        while page:
+            next_page = None
+            if len(page) == page_size:
+                offset += page_size
+                if prefetch:
+                    next_page = executor.submit(fetch_page, offset)
+            yield from page
+            if len(page) < page_size:
+                return
+            page = next_page.result() if next_page else fetch_page(offset)
+
 
 def prepare_mock_server():
     """
     Prepare mock server for authorization redirect from front-end channel
     """
 
-    requests.put(f"{MOCKSERVER_URL}/mockserver/reset")
-    requests.put(
-        f"{MOCKSERVER_URL}/mockserver/expectation",
-        json={
-            "httpRequest": {"path": "/cb"},
+    http_session.put(f"{MOCKSERVER_URL}/mockserver/reset")
+    if webhooks.running:
+        # the webhook receiver answers and wakes up the holder right away
+        action = {
+            "httpForward": {
+                "host": webhooks.host,
+                "port": webhooks.port,
+                "scheme": "HTTP",
+            }
+        }
+    else:
+        action = {
             "httpResponse": {
                 "statusCode": 200,
                 "body": {"type": "string", "string": "Login Successful"},
-            },
-        },
+            }
+        }
+    http_session.put(
+        f"{MOCKSERVER_URL}/mockserver/expectation",
+        json={"httpRequest": {"path": "/cb"}, **action},
     )
 
 
-def prepare_issuer():
+def load_issuer_state() -> dict:
     """
-    Prepare an oid4vci issuer
-    1. Create issuing DID
-    2. Publish issuing DID
-    3. Create credential schema
-    4. Create oid4vci issuer
-    5. Create oid4vci credential configuration from schema
+    Issuer IDs resolved by a previous run against the same agent, if any
     """
 
-    # 1. Create issuing DID
-    dids = requests.get(f"{AGENT_URL}/did-registrar/dids").json()["contents"]
-    if len(dids) == 0:
-        requests.post(
-            f"{AGENT_URL}/did-registrar/dids",
+    try:
+        with open(ISSUER_STATE_FILE) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get("agentUrl") != AGENT_URL:
+        return {}
+    return state
+
+
+def save_issuer_state(state: dict):
+    tmp_file = f"{ISSUER_STATE_FILE}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump({"agentUrl": AGENT_URL, **state}, f, indent=2)
+    os.replace(tmp_file, ISSUER_STATE_FILE)
+
+
+def credential_configuration_url(issuer_id: str) -> str:
+    return (
+        f"{AGENT_URL}/oid4vci/issuers/{issuer_id}"
+        f"/credential-configurations/{CREDENTIAL_CONFIGURATION_ID}"
+    )
+
+
+def ensure_issuer_did() -> str:
+    """
+    Reuse the first DID of the wallet, or create one, and wait until it is published
+    """
+
+    dids_url = f"{AGENT_URL}/did-registrar/dids"
+    issuer_did = next(iter_paginated(dids_url), None)
+    if issuer_did is None:
+        http_session.post(
+            dids_url,
             json={
                 "documentTemplate": {
                     "publicKeys": [{"id": "iss", "purpose": "assertionMethod"}],
@@ -63,79 +381,138 @@ def prepare_issuer():
                 }
             },
         )
-        dids = requests.get(f"{AGENT_URL}/did-registrar/dids").json()["contents"]
-
-    # 2. Publish issuing DID
-    issuer_did = dids[0]
-    while issuer_did["status"] != "PUBLISHED":
-        time.sleep(2)
-        canonical_did = issuer_did["did"]
-        issuer_did = requests.get(
-            f"{AGENT_URL}/did-registrar/dids/{canonical_did}"
-        ).json()
+        issuer_did = next(iter_paginated(dids_url))
 
+    canonical_did = issuer_did["did"]
+
+    def fetch_did():
+        did = http_session.get(f"{AGENT_URL}/did-registrar/dids/{canonical_did}").json()
         # publish if not pending
-        if issuer_did["status"] == "CREATED":
-            requests.post(
+        if did["status"] == "CREATED":
+            http_session.post(
                 f"{AGENT_URL}/did-registrar/dids/{canonical_did}/publications"
             )
-    canonical_did = issuer_did["did"]
-    global CREDENTIAL_ISSUER_DID
-    CREDENTIAL_ISSUER_DID = canonical_did
+        return did
 
-    # 3. Create credential schema
-    schema = requests.post(
-        f"{AGENT_URL}/schema-registry/schemas",
-        json={
-            "name": "UniversityDegree",
-            "version": "1.0.0",
-            "type": "https://w3c-ccg.github.io/vc-json-schemas/schema/2.0/schema.json",
-            "schema": {
-                "$id": "https://example.com/driving-license-1.0",
-                "$schema": "https://json-schema.org/draft/2020-12/schema",
-                "type": "object",
-                "properties": {
-                    "firstName": {"type": "string"},
-                    "degree": {"type": "string"},
-                    "grade": {"type": "number"},
+    if issuer_did["status"] != "PUBLISHED":
+        wait_until(
+            fetch_did,
+            lambda did: did["status"] == "PUBLISHED",
+            event_of_type("DIDStatusUpdated"),
+        )
+    return canonical_did
+
+
+def ensure_schema(author: str) -> str:
+    """
+    Reuse the schema with the same author, name and version, or create it
+    """
+
+    schemas_url = f"{AGENT_URL}/schema-registry/schemas"
+    query = {"author": author, "name": SCHEMA_NAME, "version": SCHEMA_VERSION}
+    schema = next(iter_paginated(schemas_url, query), None)
+    if schema is None:
+        schema = http_session.post(
+            schemas_url,
+            json={
+                **query,
+                "type": "https://w3c-ccg.github.io/vc-json-schemas/schema/2.0/schema.json",
+                "schema": {
+                    "$id": "https://example.com/driving-license-1.0",
+                    "$schema": "https://json-schema.org/draft/2020-12/schema",
+                    "type": "object",
+                    "properties": {
+                        "firstName": {"type": "string"},
+                        "degree": {"type": "string"},
+                        "grade": {"type": "number"},
+                    },
+                    "required": ["firstName", "grade"],
+                    "additionalProperties": False,
                 },
-                "required": ["firstName", "grade"],
-                "additionalProperties": False,
+                "tags": [],
             },
-            "tags": [],
-            "author": canonical_did,
-        },
-    ).json()
-    schema_guid = schema["guid"]
+        ).json()
+    return schema["guid"]
+
 
-    # 4. Create oid4vci issuer
-    credential_issuer = requests.post(
+def ensure_credential_issuer() -> str:
+    """
+    Reuse an oid4vci issuer of the same authorization server, or create one
+    """
+
+    # the issuers list is not paginated
+    issuers = http_session.get(f"{AGENT_URL}/oid4vci/issuers").json()["contents"]
+    for issuer in issuers:
+        if issuer["authorizationServerUrl"] == AUTHORIZATION_SERVER:
+            return issuer["id"]
+    credential_issuer = http_session.post(
         f"{AGENT_URL}/oid4vci/issuers",
         json={
             "authorizationServer": {
-                "url": "http://external-keycloak-issuer:8080/realms/students",
+                "url": AUTHORIZATION_SERVER,
                 "clientId": "cloud-agent",
                 "clientSecret": "secret",
             }
         },
     ).json()
-    issuer_id = credential_issuer["id"]
-    global CREDENTIAL_ISSUER
-    CREDENTIAL_ISSUER = f"{AGENT_URL}/oid4vci/issuers/{issuer_id}"
+    return credential_issuer["id"]
 
-    # 5. Create oid4vci credential configuration from schema
-    cred_config = requests.post(
-        f"{CREDENTIAL_ISSUER}/credential-configurations",
+
+def ensure_credential_configuration(issuer_id: str, schema_guid: str):
+    """
+    Create the oid4vci credential configuration from the schema, unless it exists
+    """
+
+    if http_session.get(credential_configuration_url(issuer_id)).status_code == 200:
+        return
+    http_session.post(
+        f"{AGENT_URL}/oid4vci/issuers/{issuer_id}/credential-configurations",
         json={
             "configurationId": CREDENTIAL_CONFIGURATION_ID,
             "format": "jwt_vc_json",
             "schemaId": f"{AGENT_URL}/schema-registry/schemas/{schema_guid}/schema",
         },
-    ).json()
+    ).raise_for_status()
+
+
+def prepare_issuer(reuse_state: bool = True):
+    """
+    Prepare an oid4vci issuer, reusing what already exists in the agent
+    1. Create and publish issuing DID
+    2. Create credential schema
+    3. Create oid4vci issuer
+    4. Create oid4vci credential configuration from schema
+
+    The resolved IDs are saved to ISSUER_STATE_FILE. A later run only checks
+    that the saved credential configuration still exists.
+    """
+
+    global CREDENTIAL_ISSUER_DID, CREDENTIAL_ISSUER
+    state = load_issuer_state() if reuse_state else {}
+    if state and (
+        http_session.get(credential_configuration_url(state["issuerId"])).status_code
+        == 200
+    ):
+        CREDENTIAL_ISSUER_DID = state["issuerDid"]
+        CREDENTIAL_ISSUER = f"{AGENT_URL}/oid4vci/issuers/{state['issuerId']}"
+        return
+
+    CREDENTIAL_ISSUER_DID = ensure_issuer_did()
+    schema_guid = ensure_schema(CREDENTIAL_ISSUER_DID)
+    issuer_id = ensure_credential_issuer()
+    ensure_credential_configuration(issuer_id, schema_guid)
+    CREDENTIAL_ISSUER = f"{AGENT_URL}/oid4vci/issuers/{issuer_id}"
+    save_issuer_state(
+        {
+            "issuerDid": CREDENTIAL_ISSUER_DID,
+            "schemaGuid": schema_guid,
+            "issuerId": issuer_id,
+        }
+    )
 
 
 def issuer_create_credential_offer(claims):
-    response = requests.post(
+    response = http_session.post(
         f"{CREDENTIAL_ISSUER}/credential-offers",
         json={
             "credentialConfigurationId": CREDENTIAL_CONFIGURATION_ID,
@@ -146,30 +523,115 @@ def issuer_create_credential_offer(claims):
     return response.json()["credentialOffer"]
 
 
+# discovery documents shared by all holder flows
+METADATA_CACHE_SIZE = int(os.environ.get("METADATA_CACHE_SIZE", "64"))
+# lifetime of the documents served without Cache-Control max-age
+METADATA_CACHE_TTL = float(os.environ.get("METADATA_CACHE_TTL", "300"))
+
+
+def cache_lifetime(headers) -> float | None:
+    """
+    Seconds a response can be reused without revalidation, None if it must not be stored
+    """
+
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    try:
+        return max(0.0, float(directives["max-age"]) - float(headers.get("Age", 0)))
+    except (KeyError, ValueError):
+        return METADATA_CACHE_TTL
+
+
+class MetadataCache:
+    """
+    Bounded LRU cache of metadata documents, honoring Cache-Control and ETag
+    Concurrent lookups of the same stale URL wait for a single request
+    The returned documents are shared and must not be modified
+    """
+
+    def __init__(self, max_size: int = METADATA_CACHE_SIZE):
+        self.max_size = max_size
+        # url -> (metadata, etag, expiry)
+        self._entries = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry and entry[2] > time.monotonic():
+                self._entries.move_to_end(url)
+                return entry[0]
+            pending = self._pending.get(url)
+            if pending is None:
+                pending = self._pending[url] = Future()
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            return pending.result()
+        try:
+            metadata = self._fetch(url, entry)
+            pending.set_result(metadata)
+            return metadata
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[url]
+
+    def _fetch(self, url: str, entry):
+        headers = {"If-None-Match": entry[1]} if entry and entry[1] else {}
+        response = http_session.get(url, headers=headers)
+        if response.status_code == 304 and entry:
+            metadata, etag = entry[0], response.headers.get("ETag", entry[1])
+        else:
+            response.raise_for_status()
+            metadata, etag = response.json(), response.headers.get("ETag")
+        lifetime = cache_lifetime(response.headers)
+        with self._lock:
+            if lifetime is None:
+                self._entries.pop(url, None)
+            else:
+                self._entries[url] = (metadata, etag, time.monotonic() + lifetime)
+                self._entries.move_to_end(url)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return metadata
+
+
+metadata_cache = MetadataCache()
+
+
 def holder_get_issuer_metadata(credential_issuer: str):
     metadata_url = f"{credential_issuer}/.well-known/openid-credential-issuer"
-    response = requests.get(metadata_url).json()
-    return response
+    return metadata_cache.get(metadata_url)
 
 
 def holder_get_issuer_as_metadata(authorization_server: str):
     metadata_url = f"{authorization_server}/.well-known/openid-configuration"
-    response = requests.get(metadata_url)
-    metadata = response.json()
-    return metadata
+    return metadata_cache.get(metadata_url)
 
 
 def holder_start_login_flow(auth_endpoint: str, token_endpoint: str, issuer_state: str):
     def wait_redirect_authorization_code() -> str:
         print("wating for authorization redirect ...")
-        while True:
-            response = requests.put(
+        response = wait_until(
+            lambda: http_session.put(
                 f"{MOCKSERVER_URL}/mockserver/retrieve?type=REQUESTS",
                 json={"path": "/cb", "method": "GET"},
-            ).json()
-            if len(response) > 0:
-                break
-            time.sleep(1)
+            ).json(),
+            lambda requests_received: len(requests_received) > 0,
+            event_of_type("AuthorizationRedirect"),
+            timeout=float("inf"),
+        )
 
         authorzation_code = response[0]["queryStringParameters"]["code"][0]
         print(f"code: {authorzation_code}")
@@ -177,16 +639,7 @@ def holder_start_login_flow(auth_endpoint: str, token_endpoint: str, issuer_stat
 
     def start_authorization_request(auth_endpoint: str, issuer_state: str):
         # Authorization Request
-        queries = urllib.parse.urlencode(
-            {
-                "redirect_uri": LOGIN_REDIRECT_URL,
-                "response_type": "code",
-                "client_id": ALICE_CLIENT_ID,
-                "scope": "openid " + CREDENTIAL_CONFIGURATION_ID,
-                "issuer_state": issuer_state,
-            }
-        )
-        login_url = f"{auth_endpoint}?{queries}"
+        login_url = holder_authorization_url(auth_endpoint, issuer_state)
         print("\n##############################\n")
         print("Open this link in the browser to login\n")
         print(login_url)
@@ -196,56 +649,234 @@ def holder_start_login_flow(auth_endpoint: str, token_endpoint: str, issuer_stat
         authorzation_code = wait_redirect_authorization_code()
         return authorzation_code
 
-    def start_token_request(token_endpoint: str, authorization_code: str):
-        # Token Request
-        response = requests.post(
-            token_endpoint,
-            data={
-                "grant_type": "authorization_code",
-                "code": authorization_code,
-                "client_id": ALICE_CLIENT_ID,
-                "redirect_uri": LOGIN_REDIRECT_URL,
-            },
-        )
-        return response.json()
-
     authorization_code = start_authorization_request(auth_endpoint, issuer_state)
-    token_response = start_token_request(token_endpoint, authorization_code)
+    token_response = holder_token_request(token_endpoint, authorization_code)
     return token_response
 
 
+def holder_authorization_url(auth_endpoint: str, issuer_state: str) -> str:
+    queries = urllib.parse.urlencode(
+        {
+            "redirect_uri": LOGIN_REDIRECT_URL,
+            "response_type": "code",
+            "client_id": ALICE_CLIENT_ID,
+            "scope": "openid " + CREDENTIAL_CONFIGURATION_ID,
+            "issuer_state": issuer_state,
+        }
+    )
+    return f"{auth_endpoint}?{queries}"
+
+
+def holder_token_request(token_endpoint: str, authorization_code: str):
+    # Token Request
+    response = http_session.post(
+        token_endpoint,
+        data={
+            "grant_type": "authorization_code",
+            "code": authorization_code,
+            "client_id": ALICE_CLIENT_ID,
+            "redirect_uri": LOGIN_REDIRECT_URL,
+        },
+    )
+    return response.json()
+
+
+class LoginFormParser(html.parser.HTMLParser):
+    """
+    Collect the action and the inputs of the first form of a Keycloak page
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.fields = {}
+        self._in_form = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form" and self.action is None:
+            self.action = attrs.get("action")
+            self._in_form = True
+        elif tag == "input" and self._in_form and attrs.get("name"):
+            if attrs.get("type") not in ("submit", "button"):
+                self.fields[attrs["name"]] = attrs.get("value") or ""
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._in_form = False
+
+
+def to_internal_origin(url: str) -> str:
+    parts = urllib.parse.urlsplit(url)
+    internal = urllib.parse.urlsplit(AUTHORIZATION_SERVER_INTERNAL_ORIGIN)
+    return urllib.parse.urlunsplit(
+        parts._replace(scheme=internal.scheme, netloc=internal.netloc)
+    )
+
+
+def holder_headless_authorization(auth_endpoint: str, issuer_state: str) -> str:
+    """
+    Log in and grant consent without a browser, return the authorization code
+    1. Open the authorization URL, Keycloak answers with its login form
+    2. Submit the form with Alice credentials
+    3. Accept the consent form, only shown the first time
+    4. Take the code from the redirect to LOGIN_REDIRECT_URL
+    """
+
+    # cookies belong to one login, connections are shared with other holders
+    login_session = requests.Session()
+    login_session.mount("http://", http_session.get_adapter("http://"))
+    login_session.mount("https://", http_session.get_adapter("https://"))
+
+    login_url = holder_authorization_url(auth_endpoint, issuer_state)
+    response = login_session.get(to_internal_origin(login_url), allow_redirects=False)
+    for _ in range(5):
+        location = response.headers.get("Location", "")
+        if location.startswith(LOGIN_REDIRECT_URL):
+            queries = urllib.parse.parse_qs(urllib.parse.urlsplit(location).query)
+            return queries["code"][0]
+        if location:
+            response = login_session.get(
+                to_internal_origin(location), allow_redirects=False
+            )
+            continue
+
+        form = LoginFormParser()
+        form.feed(response.text)
+        if form.action is None:
+            raise RuntimeError(
+                f"unexpected authorization page ({response.status_code})"
+            )
+        fields = form.fields
+        if "username" in fields or "password" in fields:
+            fields.update({"username": ALICE_USERNAME, "password": ALICE_PASSWORD})
+        else:
+            fields["accept"] = "Yes"
+        response = login_session.post(
+            to_internal_origin(form.action), data=fields, allow_redirects=False
+        )
+    raise RuntimeError("authorization did not redirect with a code")
+
+
 def holder_extract_credential_offer(offer_uri: str):
-    queries = urllib.parse.urlparse(credential_offer_uri).query
+    queries = urllib.parse.urlparse(offer_uri).query
     credential_offer = urllib.parse.parse_qs(queries)["credential_offer"]
     return json.loads(credential_offer[0])
 
 
-def holder_get_credential(credential_endpoint: str, token_response):
-    access_token = token_response["access_token"]
-    c_nonce = token_response["c_nonce"]
+def load_private_key(alg: str, private_key_hex: str):
+    private_key_bytes = bytes.fromhex(private_key_hex)
+    if alg == "ES256K":
+        return ec.derive_private_key(
+            int.from_bytes(private_key_bytes, "big"), ec.SECP256K1()
+        )
+    if alg == "EdDSA":
+        return ed25519.Ed25519PrivateKey.from_private_bytes(private_key_bytes)
+    raise ValueError(f"unsupported proof algorithm {alg}")
 
-    # generate proof
-    private_key_bytes = bytes.fromhex(HOLDER_ASSERTION_PRIVATE_KEY_HEX)
-    private_key = ec.derive_private_key(
-        int.from_bytes(private_key_bytes, "big"), ec.SECP256K1()
-    )
-    public_key = private_key.public_key()
-    jwt_proof = jwt.encode(
-        headers={
-            "typ": "openid4vci-proof+jwt",
-            "kid": HOLDER_LONG_FORM_DID + "#key-0",
-        },
+
+class HolderKeyManager:
+    """
+    Derive every holder key once and keep the key objects for later proofs
+    """
+
+    def __init__(self, keys=HOLDER_KEYS):
+        self._keys = keys
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def get(self, alg: str):
+        """
+        Key id and private key object for a JWT algorithm
+        """
+
+        with self._lock:
+            if alg not in self._loaded:
+                if alg not in self._keys:
+                    raise ValueError(f"no holder key configured for {alg}")
+                kid, private_key_hex = self._keys[alg]
+                self._loaded[alg] = (kid, load_private_key(alg, private_key_hex))
+            return self._loaded[alg]
+
+
+holder_keys = HolderKeyManager()
+
+
+def holder_proof(c_nonce: str, audience: str, alg: str = HOLDER_PROOF_ALG) -> str:
+    kid, private_key = holder_keys.get(alg)
+    return jwt.encode(
+        headers={"typ": "openid4vci-proof+jwt", "kid": kid},
         payload={
             "iss": ALICE_CLIENT_ID,
-            "aud": CREDENTIAL_ISSUER,
+            "aud": audience,
             "iat": int(time.time()),
             "nonce": c_nonce,
         },
         key=private_key,
-        algorithm="ES256K",  # TODO: switch to EdDSA alg (Ed25519)
+        algorithm=alg,
     )
 
-    response = requests.post(
+
+def preload_holder_key(alg: str):
+    holder_keys.get(alg)
+
+
+class ProofSigner:
+    """
+    Sign proofs in parallel worker processes, signing is CPU bound
+    Workers are spawned, not forked from the threads running the holder flows,
+    and each one derives the holder key of `alg` when it starts
+    """
+
+    def __init__(self, processes: int = None, alg: str = HOLDER_PROOF_ALG):
+        self.processes = processes or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=preload_holder_key,
+            initargs=(alg,),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown()
+
+    def sign(self, c_nonce: str, audience: str, alg: str = HOLDER_PROOF_ALG) -> str:
+        return self._pool.submit(holder_proof, c_nonce, audience, alg).result()
+
+    def sign_many(self, c_nonces, audience: str, alg: str = HOLDER_PROOF_ALG):
+        """
+        Sign a batch of proofs, in chunks to amortize the inter-process calls
+        """
+
+        c_nonces = list(c_nonces)
+        chunksize = max(len(c_nonces) // (4 * self.processes), 1)
+        return list(
+            self._pool.map(
+                holder_proof,
+                c_nonces,
+                repeat(audience),
+                repeat(alg),
+                chunksize=chunksize,
+            )
+        )
+
+
+def holder_get_credential(
+    credential_endpoint: str, token_response, jwt_proof: str = None
+):
+    access_token = token_response["access_token"]
+
+    # generate proof
+    if jwt_proof is None:
+        jwt_proof = holder_proof(token_response["c_nonce"], CREDENTIAL_ISSUER)
+
+    response = http_session.post(
         credential_endpoint,
         headers={"Authorization": f"Bearer {access_token}"},
         json={
@@ -260,9 +891,168 @@ def holder_get_credential(credential_endpoint: str, token_response):
     return response.json()
 
 
-if __name__ == "__main__":
+LOAD_STEPS = (
+    "create_offer",
+    "extract_offer",
+    "issuer_metadata",
+    "as_metadata",
+    "authorization",
+    "token",
+    "proof",
+    "credential",
+)
+
+
+class StepTimings:
+    """
+    Durations and failures of every flow step, shared by the holder threads
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    def run(self, step: str, func, *args):
+        started = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            with self._lock:
+                self.failures[step] = self.failures.get(step, 0) + 1
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.durations.setdefault(step, []).append(elapsed)
+        return result
+
+    def report(self, flows: int, failed: int, elapsed: float):
+        def percentile(values, q):
+            # nearest-rank
+            return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+        steps = {}
+        for step in LOAD_STEPS:
+            values = sorted(self.durations.get(step, []))
+            steps[step] = {
+                "count": len(values),
+                "failed": self.failures.get(step, 0),
+                "throughput_per_s": len(values) / elapsed if elapsed else 0.0,
+            }
+            if values:
+                steps[step].update(
+                    {
+                        f"{name}_ms": percentile(values, q) * 1000
+                        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+                    }
+                )
+        return {
+            "flows": flows,
+            "failed": failed,
+            "elapsed_s": elapsed,
+            "flows_per_s": (flows - failed) / elapsed if elapsed else 0.0,
+            "steps": steps,
+        }
+
+
+def run_holder_flow(timings: StepTimings, claims, signer: ProofSigner = None):
+    """
+    Run the whole issuance flow for one holder, without user interaction
+    """
+
+    offer_uri = timings.run("create_offer", issuer_create_credential_offer, claims)
+    offer = timings.run("extract_offer", holder_extract_credential_offer, offer_uri)
+    issuer_state = offer["grants"]["authorization_code"]["issuer_state"]
+    issuer_metadata = timings.run(
+        "issuer_metadata", holder_get_issuer_metadata, CREDENTIAL_ISSUER
+    )
+    as_metadata = timings.run(
+        "as_metadata",
+        holder_get_issuer_as_metadata,
+        issuer_metadata["authorization_servers"][0],
+    )
+    code = timings.run(
+        "authorization",
+        holder_headless_authorization,
+        as_metadata["authorization_endpoint"],
+        issuer_state,
+    )
+    token_response = timings.run(
+        "token", holder_token_request, as_metadata["token_endpoint"], code
+    )
+    jwt_proof = timings.run(
+        "proof",
+        signer.sign if signer else holder_proof,
+        token_response["c_nonce"],
+        CREDENTIAL_ISSUER,
+    )
+    credential = timings.run(
+        "credential",
+        holder_get_credential,
+        issuer_metadata["credential_endpoint"],
+        token_response,
+        jwt_proof,
+    )
+    if "credential" not in credential:
+        raise RuntimeError(f"no credential issued: {credential}")
+    return credential
+
+
+def run_load(holders: int, concurrency: int, proof_processes: int = 0):
+    """
+    Run the flow for many holders concurrently and report step latencies
+    With proof processes, proofs are signed in a pool of worker processes
+    """
+
+    timings = StepTimings()
+    failed = 0
+    signer = ProofSigner(proof_processes) if proof_processes > 0 else None
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                run_holder_flow,
+                timings,
+                {"firstName": f"Holder {i}", "degree": "Load Testing", "grade": 3.2},
+                signer,
+            )
+            for i in range(holders)
+        ]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"holder flow failed: {e!r}")
+    elapsed = time.perf_counter() - started
+    if signer:
+        signer.close()
+    return timings.report(holders, failed, elapsed)
+
+
+def print_load_report(report):
+    print(
+        f"\n{report['flows']} flows, {report['failed']} failed "
+        f"in {report['elapsed_s']:.1f}s, {report['flows_per_s']:.2f} flows/s\n"
+    )
+    print(
+        f"{'step':<16}{'count':>7}{'failed':>8}{'per s':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for step, stats in report["steps"].items():
+        latencies = "".join(
+            f"{stats.get(name, float('nan')):>10.1f}"
+            for name in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        print(
+            f"{step:<16}{stats['count']:>7}{stats['failed']:>8}"
+            f"{stats['throughput_per_s']:>9.2f}{latencies}"
+        )
+
+
+def run_interactive_demo(reuse_state: bool = True):
     prepare_mock_server()
-    prepare_issuer()
+    prepare_issuer(reuse_state)
 
     # step 1: Issuer create CredentialOffer
     credential_offer_uri = issuer_create_credential_offer(
@@ -309,3 +1099,51 @@ if __name__ == "__main__":
     jwt_credential = holder_get_credential(credential_endpoint, token_response)
     print("\n::::: Credential Received :::::")
     print(json.dumps(jwt_credential, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OID4VCI issuance demo")
+    parser.add_argument(
+        "--holders",
+        type=int,
+        default=0,
+        help="run N headless holder flows and report latencies instead of the demo",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=10, help="holder flows run in parallel"
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="print the load report as JSON"
+    )
+    parser.add_argument(
+        "--proof-processes",
+        type=int,
+        default=0,
+        help="sign the holder proofs in N worker processes",
+    )
+    parser.add_argument(
+        "--no-webhooks",
+        action="store_true",
+        help="do not receive agent events, poll instead",
+    )
+    parser.add_argument(
+        "--fresh-issuer",
+        action="store_true",
+        help=f"ignore {ISSUER_STATE_FILE} and look up the issuer resources again",
+    )
+    args = parser.parse_args()
+
+    if not args.no_webhooks:
+        webhooks.start()
+    try:
+        if args.holders > 0:
+            prepare_issuer(not args.fresh_issuer)
+            report = run_load(args.holders, args.concurrency, args.proof_processes)
+            if args.json:
+                print(json.dumps(report, indent=2))
+            else:
+                print_load_report(report)
+        else:
+            run_interactive_demo(not args.fresh_issuer)
+    finally:
+        webhooks.stop()
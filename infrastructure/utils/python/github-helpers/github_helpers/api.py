@@ -1,27 +1,289 @@
 """
 GitHub Helpers API module
 """
+import fnmatch
+import hashlib
+import json
 import os
+import tempfile
+import threading
+import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 import requests
+import urllib3
 from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from urllib3 import Retry
 
+# pylint: disable=E0402
+from .artifact_cache import link_or_copy
+from .ratelimit import RateLimiter, is_rate_limited
+from .versions import VersionIndex, version_names
+
+# Maximum page size allowed by GitHub API for list endpoints
+PER_PAGE = 100
+
+# Number of runs whose artifacts are looked up concurrently
+LATEST_RUN_BATCH = 8
+
+# Rate limited requests are sent again up to this number of times
+RATE_LIMIT_RETRIES = 5
+# Seconds to wait after a secondary rate limit without Retry-After
+SECONDARY_RATE_LIMIT_WAIT = 60
+
+# Interrupted downloads are resumed up to this number of times
+RESUME_ATTEMPTS = 5
+
+# Seconds to establish a connection, and to wait for each read, so that a
+# stalled connection fails and its download is resumed
+CONNECT_TIMEOUT = 30
+READ_TIMEOUT = 300
+
+# Archives up to this size are unpacked from memory, bigger ones roll over
+# to a temporary file which is removed as soon as the extraction is done.
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+# Downloads start reading MIN_CHUNK_SIZE bytes at a time and double the
+# chunk each time the socket fills it, up to MAX_CHUNK_SIZE.
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def copy_stream(raw, fileobj, digest=None):
+    """Copies a raw response stream into a file object.
+
+    Reads go into a single preallocated buffer through ``readinto``, and
+    writes take a ``memoryview`` of it, so no chunk objects are created.
+
+    :param raw: Readable stream supporting ``readinto``.
+    :param fileobj: Writable file object.
+    :param digest: Optional ``hashlib`` object updated with the data.
+    :returns: Number of bytes copied.
+    """
+    buf = memoryview(bytearray(MAX_CHUNK_SIZE))
+    chunk_size = MIN_CHUNK_SIZE
+    copied = 0
+    while True:
+        read = raw.readinto(buf[:chunk_size])
+        if not read:
+            return copied
+        fileobj.write(buf[:read])
+        if digest:
+            digest.update(buf[:read])
+        copied += read
+        if read == chunk_size and chunk_size < MAX_CHUNK_SIZE:
+            chunk_size *= 2
+
+
+def write_body(resp, fileobj, encoded, digest=None):
+    """Writes the body of a streamed response into a file object.
+
+    :param resp: Streamed ``requests`` response.
+    :param fileobj: Writable file object.
+    :param encoded: Whether the body has a ``Content-Encoding``, which the
+        raw stream still has, so requests decodes it chunk by chunk.
+    :param digest: Optional ``hashlib`` object updated with the data.
+    :returns: Number of bytes written.
+    """
+    if not encoded:
+        return copy_stream(resp.raw, fileobj, digest=digest)
+    written = 0
+    for chunk in resp.iter_content(chunk_size=MAX_CHUNK_SIZE):
+        written += fileobj.write(chunk)
+        if digest:
+            digest.update(chunk)
+    return written
+
+
+def preallocate(fileobj, length):
+    """Reserves ``length`` bytes on disk for a file, where supported.
+
+    :param fileobj: File object backed by a real file.
+    :param length: Expected file size.
+    """
+    if length <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(fileobj.fileno(), fileobj.tell(), length)
+    except OSError:
+        # e.g. the filesystem does not support it, the write will tell
+        pass
+
+
+def trim_zero_tail(fileobj):
+    """Truncates the trailing zero bytes of a partially downloaded file.
+
+    They may be space reserved by ``preallocate`` and never written, e.g.
+    when the process was killed. Real zero bytes cut this way are simply
+    downloaded again.
+
+    :param fileobj: File object opened for reading and writing, left
+        positioned at its new end.
+    """
+    end = fileobj.seek(0, os.SEEK_END)
+    while end > 0:
+        start = max(end - MAX_CHUNK_SIZE, 0)
+        fileobj.seek(start)
+        data = fileobj.read(end - start).rstrip(b"\0")
+        if data:
+            end = start + len(data)
+            break
+        end = start
+    fileobj.truncate(end)
+    fileobj.seek(end)
+
+
+def hash_file(fileobj, digest):
+    """Feeds the content of a file object to a ``hashlib`` object.
+
+    :param fileobj: Readable file object, read from its current position.
+    :param digest: ``hashlib`` object to update.
+    """
+    buf = memoryview(bytearray(MAX_CHUNK_SIZE))
+    while True:
+        read = fileobj.readinto(buf)
+        if not read:
+            return
+        digest.update(buf[:read])
+
+
+def verify_sha256(digest, sha256):
+    """Checks a computed digest against the expected one.
+
+    :param digest: ``hashlib.sha256`` object fed with the downloaded data.
+    :param sha256: Expected hex digest, optionally prefixed with ``sha256:``.
+
+    :raises GithubError: When the digests differ.
+    """
+    expected = sha256.lower().removeprefix("sha256:")
+    if digest.hexdigest() != expected:
+        raise GithubError(
+            f"SHA-256 mismatch: expected {expected}, got {digest.hexdigest()}"
+        )
+
+
+def extract_zip(fileobj, destdir, members=None):
+    """Extracts a ZIP archive from a file object.
+
+    :param fileobj: Seekable file object holding the archive.
+    :param destdir: Destination directory.
+    :param members: Optional glob patterns, e.g. ``*.jar``. A member is
+        extracted if its path or its base name matches one of them.
+        All members are extracted by default.
+    :returns: Paths of the extracted members.
+    """
+    with zipfile.ZipFile(fileobj, "r") as zip_ref:
+        names = [
+            name
+            for name in zip_ref.namelist()
+            if not members
+            or any(
+                fnmatch.fnmatch(name, pattern)
+                or fnmatch.fnmatch(os.path.basename(name), pattern)
+                for pattern in members
+            )
+        ]
+        zip_ref.extractall(destdir, members=names)
+    return [os.path.join(destdir, name) for name in names]
+
+
+# pylint: disable=R0913
+def use_cached_archive(cached, destdir, filename, unzip, members):
+    """Extracts or links a cached archive, see ``download_artifact``"""
+    if not destdir:
+        destdir = os.getcwd()
+    if unzip:
+        with open(cached, "rb") as archive:
+            return extract_zip(archive, destdir, members=members)
+    path = "{0}/{1}".format(destdir, filename or "download.zip")
+    link_or_copy(cached, path)
+    return path
+
+
+def workflow_runs_query(owner, repo, branch, status, event, workflow):
+    """Endpoint and query parameters listing the workflow runs matching filters
+
+    :param owner: Repository owner.
+    :param repo: Repository name.
+    :param branch: Optional branch name.
+    :param status: Optional run status or conclusion.
+    :param event: Optional triggering event.
+    :param workflow: Optional workflow file name or ID.
+    """
+    endpoint = f"repos/{owner}/{repo}/actions/runs"
+    if workflow:
+        endpoint = f"repos/{owner}/{repo}/actions/workflows/{workflow}/runs"
+    params = {
+        name: value
+        for name, value in (
+            ("branch", branch),
+            ("status", status),
+            ("event", event),
+        )
+        if value
+    }
+    return endpoint, params
+
+
+class PoolRetry(Retry):
+    """Retry of the connection pool leaving ``Retry-After`` to ``GithubApi``
+
+    A response asking to retry later is returned as is, so that the client
+    makes every thread sharing its rate limiter wait, instead of sleeping in
+    the calling thread only.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        return not has_retry_after and super().is_retry(
+            method, status_code, has_retry_after
+        )
+
 
 class GithubError(Exception):
     """Error happened in GitHub API call"""
 
 
+class IncompleteDownloadError(GithubError):
+    """Connection closed before the whole file was received"""
+
+
+class RangeIgnoredError(GithubError):
+    """Server sent the whole file in response to a Range request"""
+
+
+# settings, HTTP session, optional caches and hooks shared by the threads
+# pylint: disable=R0902
 class GithubApi:
     """Client for GitHub API"""
 
-    def __init__(self, token=None, owner=None, repo=None, url="https://api.github.com"):
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        token=None,
+        owner=None,
+        repo=None,
+        url="https://api.github.com",
+        pool_size=10,
+        cache=None,
+        rate_limiter=None,
+        artifact_cache=None,
+        hooks=None,
+    ):
         """Initialize a client to interact with GitHub API.
 
         :param token: GitHub API access token. Defaults to GITHUB_TOKEN env var
         :param url: The URL of the GitHub API instance
+        :param pool_size: Number of connections to keep per host
+        :param cache: Optional ``github_helpers.cache.ResponseCache``
+        :param rate_limiter: Optional ``github_helpers.ratelimit.RateLimiter``
+            shared by the threads using this client
+        :param artifact_cache: Optional
+            ``github_helpers.artifact_cache.ArtifactCache``
+        :param hooks: Optional callables receiving the request, transfer and
+            cache events, see ``github_helpers.stats``
         """
         if not token:
             raise GithubError("Missing or empty GitHub API access token")
@@ -31,7 +293,13 @@ class GithubApi:
         self.owner = owner
         self.repo = repo
         self.url = url
-        self._request_session()
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.artifact_cache = artifact_cache
+        self.hooks = list(hooks or ())
+        self._version_indexes = {}
+        self._index_lock = threading.Lock()
+        self._request_session(pool_size=pool_size)
 
     def __repr__(self):
         opts = {
@@ -41,72 +309,278 @@ class GithubApi:
         kwargs = [f"{k}={v!r}" for k, v in opts.items()]
         return f'GithubApi({", ".join(kwargs)})'
 
-    def get_workflow_artifacts(self, run_id):
+    def get_workflow_artifacts(self, run_id, limit=None):
         """Get workflow artifacts.
 
         Endpoint:
             GET: ``/repos/{owner}/{repo}/actions/runs/{run_id}/artifacts``
+
+        :param run_id: Workflow run ID.
+        :param limit: Optional number of artifacts to fetch, across pages.
+            Only the first page is fetched by default.
+        :returns: Response of GitHub, with the ``total_count`` of the run.
         """
         endpoint = f"repos/{self.owner}/{self.repo}/actions/runs/{run_id}/artifacts"
-        resp = self._get(endpoint)
-        return resp
+        return self._get_listing(endpoint, key="artifacts", limit=limit)
+
+    def iter_workflow_artifacts(self, run_id):
+        """Lazily iterate over all workflow artifacts of a run.
+
+        Endpoint:
+            GET: ``/repos/{owner}/{repo}/actions/runs/{run_id}/artifacts``
+        """
+        endpoint = f"repos/{self.owner}/{self.repo}/actions/runs/{run_id}/artifacts"
+        return self._paginate(endpoint, key="artifacts")
+
+    # pylint: disable=R0913
+    def download_artifact(
+        self,
+        artifact_id,
+        destdir=None,
+        filename=None,
+        unzip=True,
+        members=None,
+        sha256=None,
+        resume=False,
+    ):
+        """Downloads artifact by its ID
+
+        When ``unzip`` is set the archive is not saved: it is spooled in
+        memory (or in a temporary file once it exceeds ``SPOOL_MAX_SIZE``)
+        and only the selected members are written to ``destdir``.
+        With ``resume`` the archive goes through a resumable ``.part`` file
+        instead, removed once extracted. With an artifact cache, the archive
+        is taken from or added to the cache, then linked or extracted.
+
+        :param artifact_id: Artifact ID.
+        :param destdir: Optional destination directory.
+        :param filename: Optional file name of the archive.
+        :param unzip: Extract the archive instead of saving it.
+        :param members: Optional glob patterns of the members to extract.
+        :param sha256: Optional expected SHA-256 of the archive, as in the
+            ``digest`` field of the artifact.
+        :param resume: Make an interrupted download of an archive to extract
+            resumable.
 
-    def download_artifact(self, artifact_id, destdir=None, filename=None, unzip=True):
-        """Downloads artifact by its ID"""
+        :raises GithubError: When the archive does not match ``sha256``.
+        :returns: Path to the archive, or paths of the extracted members.
+        """
         endpoint = f"repos/{self.owner}/{self.repo}/actions/artifacts/{artifact_id}/zip"
-        path = self._download(endpoint, destdir=destdir, filename=filename)
-        if unzip:
-            with zipfile.ZipFile(path, "r") as zip_ref:
-                zip_ref.extractall(os.path.dirname(path))
+        if self.artifact_cache:
+            cached = self.artifact_cache.get(artifact_id, sha256)
+            if self.hooks:
+                self._emit("artifact_cache", hit=bool(cached))
+            if not cached:
+                tmp_path = self._download(
+                    endpoint,
+                    destdir=self.artifact_cache.directory,
+                    filename=self.artifact_cache.temp_name(artifact_id),
+                    sha256=sha256,
+                    source_id=artifact_id,
+                )
+                cached = self.artifact_cache.add(tmp_path, artifact_id, sha256)
+            return use_cached_archive(cached, destdir, filename, unzip, members)
+        if not unzip:
+            return self._download(
+                endpoint,
+                destdir=destdir,
+                filename=filename,
+                sha256=sha256,
+                source_id=artifact_id,
+            )
+        if not destdir:
+            destdir = os.getcwd()
+        if resume:
+            path = self._download(
+                endpoint,
+                destdir=destdir,
+                filename=filename,
+                sha256=sha256,
+                source_id=artifact_id,
+            )
+            try:
+                with open(path, "rb") as archive:
+                    return extract_zip(archive, destdir, members=members)
+            finally:
                 os.remove(path)
-        return path
+        with tempfile.SpooledTemporaryFile(
+            max_size=SPOOL_MAX_SIZE, dir=destdir
+        ) as spool:
+            digest = hashlib.sha256() if sha256 else None
+            self._download_to(endpoint, spool, digest=digest)
+            if digest:
+                verify_sha256(digest, sha256)
+            spool.seek(0)
+            return extract_zip(spool, destdir, members=members)
 
-    def get_package_versions(self, package_name, package_type="maven"):
+    def get_package_versions(self, package_name, package_type="maven", limit=None):
         """Get versions of Maven package at GitHib packages
 
         Endpoint:
             GET: ``/orgs/{org}/packages/{package_type}/{package_name}/versions``
+
+        :param limit: Optional number of versions to fetch, across pages.
+            Only the first page is fetched by default.
         """
         endpoint = f"orgs/{self.owner}/packages/{package_type}/{package_name}/versions"
-        resp = self._get(endpoint)
-        return resp
+        return self._get_listing(endpoint, limit=limit)
+
+    def iter_package_versions(self, package_name, package_type="maven"):
+        """Lazily iterate over all versions of a package at GitHub packages
+
+        Endpoint:
+            GET: ``/orgs/{org}/packages/{package_type}/{package_name}/versions``
+        """
+        endpoint = f"orgs/{self.owner}/packages/{package_type}/{package_name}/versions"
+        return self._paginate(endpoint)
+
+    def get_package_version_index(self, package_name, package_type="maven", until=None):
+        """Get all versions of a package at GitHub packages, sorted by semver
+
+        Endpoint:
+            GET: ``/orgs/{org}/packages/{package_type}/{package_name}/versions``
+
+        :param until: Optional predicate to stop listing early, the index
+            may then be partial, see ``_version_index``.
+        :returns: ``github_helpers.versions.VersionIndex`` of the version
+            names, all the tags for containers.
+        """
+        endpoint = f"orgs/{self.owner}/packages/{package_type}/{package_name}/versions"
+        return self._version_index(
+            endpoint, lambda version: version_names(version, package_type), until
+        )
 
-    def get_release_versions(self):
+    def get_release_versions(self, limit=None):
         """Get versions of Maven package at GitHib packages
 
         Endpoint:
             GET: ``/orgs/{owner}/{repo}/releases``
+
+        :param limit: Optional number of releases to fetch, across pages.
+            Only the first page is fetched by default.
         """
         endpoint = f"repos/{self.owner}/{self.repo}/releases"
-        resp = self._get(endpoint)
-        return resp
+        return self._get_listing(endpoint, limit=limit)
+
+    def iter_release_versions(self):
+        """Lazily iterate over all releases of the repository
+
+        Endpoint:
+            GET: ``/orgs/{owner}/{repo}/releases``
+        """
+        endpoint = f"repos/{self.owner}/{self.repo}/releases"
+        return self._paginate(endpoint)
+
+    def get_release_version_index(self, until=None):
+        """Get all release tags of the repository, sorted by semver
+
+        Endpoint:
+            GET: ``/orgs/{owner}/{repo}/releases``
 
-    def get_workflow_runs(self, branch=None):
+        :param until: Optional predicate to stop listing early, the index
+            may then be partial, see ``_version_index``.
+        :returns: ``github_helpers.versions.VersionIndex`` of the tag names.
+        """
+        endpoint = f"repos/{self.owner}/{self.repo}/releases"
+        return self._version_index(endpoint, version_names, until)
+
+    # pylint: disable=R0913
+    def get_workflow_runs(
+        self, branch=None, limit=None, status=None, event=None, workflow=None
+    ):
         """Get workflow runs
 
         Endpoint:
             GET ``/repos/{owner}/{repo}/actions/runs``
+
+        :param branch: Optional branch to filter runs by.
+        :param limit: Optional number of runs to fetch, across pages. Only
+            the first page is fetched by default.
+        :param status: Optional status or conclusion, e.g. ``success``.
+        :param event: Optional triggering event, e.g. ``push``.
+        :param workflow: Optional workflow file name or ID.
+        :returns: Response of GitHub, with the ``total_count`` of the runs
+            matching the filters.
         """
-        endpoint = f"repos/{self.owner}/{self.repo}/actions/runs"
-        if branch:
-            endpoint = f"{endpoint}?branch={branch}"
-        resp = self._get(endpoint)
-        return resp
+        endpoint, params = workflow_runs_query(
+            self.owner, self.repo, branch, status, event, workflow
+        )
+        return self._get_listing(
+            endpoint, key="workflow_runs", limit=limit, params=params
+        )
+
+    def iter_workflow_runs(self, branch=None, status=None, event=None, workflow=None):
+        """Lazily iterate over workflow runs, most recent first
+
+        Filters are applied by GitHub, so runs that do not match are never
+        transferred.
+
+        Endpoint:
+            GET ``/repos/{owner}/{repo}/actions/runs``
+            GET ``/repos/{owner}/{repo}/actions/workflows/{workflow}/runs``
+
+        :param branch: Optional branch to filter runs by.
+        :param status: Optional status or conclusion, e.g. ``success``.
+        :param event: Optional triggering event, e.g. ``push``.
+        :param workflow: Optional workflow file name or ID.
+        """
+        endpoint, params = workflow_runs_query(
+            self.owner, self.repo, branch, status, event, workflow
+        )
+        return self._paginate(endpoint, key="workflow_runs", params=params)
+
+    def find_latest_run_artifacts(self, batch_size=LATEST_RUN_BATCH, **filters):
+        """Get artifacts of the most recent workflow run having some.
+
+        Artifacts of ``batch_size`` runs are requested concurrently, batch
+        after batch, until a run with artifacts is found.
+
+        :param batch_size: Number of runs to look at concurrently.
+        :param filters: Filters of ``iter_workflow_runs``.
+        :returns: Workflow artifacts, or an empty dict if no run has any.
+        """
+        runs = self.iter_workflow_runs(**filters)
+        with ThreadPoolExecutor(max_workers=batch_size) as executor:
+            while True:
+                batch = list(islice(runs, batch_size))
+                if not batch:
+                    return {}
+                for artifacts in executor.map(
+                    lambda run: list(self.iter_workflow_artifacts(run["id"])), batch
+                ):
+                    if artifacts:
+                        return {"total_count": len(artifacts), "artifacts": artifacts}
+
+    def set_pool_size(self, pool_size):
+        """Resize the connection pool so that `pool_size` requests can
+        share the session concurrently without opening extra connections.
+
+        The session is kept, its adapters are replaced and closed.
+
+        :param pool_size: Number of connections to keep per host.
+        """
+        self._mount_adapter(pool_size)
 
     def _request_session(
         self,
         retries=3,
         backoff_factor=0.3,
-        status_forcelist=(408, 429, 500, 502, 503, 504, 520, 521, 522, 523, 524),
+        status_forcelist=(408, 500, 502, 503, 504, 520, 521, 522, 523, 524),
+        pool_size=10,
     ):
         """Get a session with Retry enabled.
 
+        Rate limited responses, and any response with ``Retry-After``, are
+        not retried here but in ``_send``, so that the wait applies to all
+        the threads sharing the client.
+
         :param retries: Number of retries to allow.
         :param backoff_factor: Backoff factor to apply between attempts.
         :param status_forcelist: HTTP status codes to force a retry on.
+        :param pool_size: Number of connections to keep per host.
         """
         self._session = requests.Session()
-        retry = Retry(
+        self._retry = PoolRetry(
             total=retries,
             backoff_factor=backoff_factor,
             status_forcelist=status_forcelist,
@@ -115,46 +589,391 @@ class GithubApi:
             raise_on_status=False,
             respect_retry_after_header=False,
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        self._mount_adapter(pool_size)
+        return self._session
+
+    def _mount_adapter(self, pool_size):
+        """Mount an adapter keeping `pool_size` connections per host.
+
+        The number of per-host pools is left to its default: artifact
+        downloads are redirected to another host, which must not evict the
+        pool of the API host.
+        """
+        adapter = HTTPAdapter(max_retries=self._retry, pool_maxsize=pool_size)
+        previous = set(self._session.adapters.values())
         self._session.mount("http://", adapter)
         self._session.mount("https://", adapter)
-        return self._session
+        for old in previous:
+            old.close()
 
-    def _get(self, endpoint):
+    def _get(self, endpoint, params=None):
         """Send a GET HTTP request.
 
         :param endpoint: API endpoint to call.
         :type endpoint: str
+        :param params: Optional query parameters.
+        :type params: dict
 
         :raises requests.exceptions.HTTPError: When response code is not successful.
         :returns: A JSON object with the response from the API.
         """
+        request_url = "{0}/{1}".format(self.url, endpoint)
+        body, _ = self._get_page(request_url, params=params)
+        return body
+
+    def _get_page(self, request_url, params=None):
+        """Send a GET HTTP request to an absolute URL.
+
+        With a cache configured, the request is made conditional on the ETag
+        of the cached response, and a ``304 Not Modified`` is served from it.
+
+        :param request_url: URL to call.
+        :type request_url: str
+        :param params: Optional query parameters.
+        :type params: dict
+
+        :raises requests.exceptions.HTTPError: When response code is not successful.
+        :returns: A JSON object with the response and the URL of the next page.
+        """
         headers = {"Accept": "application/vnd.github.v3+json"}
         auth = HTTPBasicAuth(self.token, "")
-        resp = None
-        request_url = "{0}/{1}".format(self.url, endpoint)
-        resp = self._session.get(request_url, auth=auth, headers=headers)
+        cached = None
+        if self.cache:
+            request_url = (
+                requests.Request("GET", request_url, params=params).prepare().url
+            )
+            params = None
+            cache_key = self._cache_key(request_url)
+            cached = self.cache.get(cache_key)
+            if cached:
+                headers["If-None-Match"] = cached["etag"]
+        resp = self._send(request_url, params=params, auth=auth, headers=headers)
+        if cached and resp.status_code == 304:
+            self.cache.record(hit=True)
+            if self.hooks:
+                self._emit("cache", hit=True)
+            return cached["body"], cached["next"]
         resp.raise_for_status()
-        return resp.json()
+        body = resp.json()
+        next_url = resp.links.get("next", {}).get("url")
+        if self.cache:
+            self.cache.record(hit=False)
+            if self.hooks:
+                self._emit("cache", hit=False)
+            if resp.headers.get("ETag"):
+                self.cache.put(cache_key, resp.headers["ETag"], body, next_url)
+        return body, next_url
+
+    def _cache_key(self, request_url, kind=""):
+        """Key of a response cache entry.
+
+        Responses depend on the token permissions, so they are not shared
+        between tokens.
+        """
+        token_digest = hashlib.sha256(self.token.encode()).hexdigest()
+        return " ".join(filter(None, (token_digest, kind, request_url)))
+
+    def _version_index(self, endpoint, names_of, until=None):
+        """Build the version index of a paginated endpoint.
+
+        Every page is fetched once and the index is kept for the lifetime of
+        the client. With a response cache, the index is also stored on disk
+        along with a digest of the names of the first page: GitHub lists the
+        most recent versions first, so while those names are unchanged, the
+        first page usually being answered by a ``304 Not Modified``, the
+        stored index is reused without fetching the other pages.
+
+        All the pages are listed by default. Callers may opt in to stop
+        early with ``until``: without a response cache, paging then stops as
+        soon as it holds for the versions listed so far. The index returned
+        is partial and not kept, so its latest version is only the highest
+        one of the pages listed.
+
+        :param endpoint: API endpoint listing the versions.
+        :type endpoint: str
+        :param names_of: Function giving the names of a listed version.
+        :param until: Optional predicate on a ``VersionIndex``, e.g. the
+            latest version matching some filters is known. The index may
+            then be partial.
+
+        :raises requests.exceptions.HTTPError: When response code is not successful.
+        :returns: ``github_helpers.versions.VersionIndex``
+        """
+        with self._index_lock:
+            if endpoint in self._version_indexes:
+                return self._version_indexes[endpoint]
+        request_url = "{0}/{1}".format(self.url, endpoint)
+        page, next_url = self._get_page(request_url, params={"per_page": PER_PAGE})
+        names = [name for version in page for name in names_of(version)]
+        # names only, other fields like download counts change all the time
+        first_page = hashlib.sha256(json.dumps(names).encode("utf-8")).hexdigest()
+        index_key = self._cache_key(request_url, kind="index")
+        stored = (self.cache.get(index_key) if self.cache else None) or {}
+        if stored.get("etag") == first_page:
+            names = stored["body"]
+        else:
+            while next_url:
+                if not self.cache and until and until(VersionIndex(names)):
+                    return VersionIndex(names)
+                page, next_url = self._get_page(next_url)
+                names.extend(name for version in page for name in names_of(version))
+            if self.cache:
+                self.cache.put(index_key, first_page, names)
+        index = VersionIndex(names)
+        with self._index_lock:
+            self._version_indexes[endpoint] = index
+        return index
+
+    def _send(self, request_url, **kwargs):
+        """Send a GET HTTP request paced by the rate limiter.
+
+        Requests rejected by a rate limit, or unavailable with a
+        ``Retry-After``, are sent again once the limiter lets them through,
+        up to ``RATE_LIMIT_RETRIES`` times. Connecting and every read are
+        bounded by ``CONNECT_TIMEOUT`` and ``READ_TIMEOUT``.
+
+        :param request_url: URL to call.
+        :type request_url: str
+        :param kwargs: Arguments of ``requests.Session.get``.
+
+        :returns: The response from the API.
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.rate_limiter.acquire()
+            started = time.perf_counter()
+            resp = self._session.get(
+                request_url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs
+            )
+            self.rate_limiter.update(resp.headers)
+            if self.hooks:
+                self._emit_request(request_url, resp, time.perf_counter() - started)
+            unavailable = resp.status_code == 503 and "Retry-After" in resp.headers
+            if attempt == RATE_LIMIT_RETRIES or not (
+                unavailable or is_rate_limited(resp)
+            ):
+                return resp
+            remaining = resp.headers.get("X-RateLimit-Remaining")
+            if "Retry-After" not in resp.headers and remaining != "0":
+                # secondary rate limit without a hint, GitHub asks for a minute
+                self.rate_limiter.block(SECONDARY_RATE_LIMIT_WAIT * 2**attempt)
+            resp.close()
+        return resp
+
+    def _emit(self, event, **data):
+        """Call the hooks with an event, see ``github_helpers.stats``."""
+        for hook in self.hooks:
+            hook(event, **data)
+
+    def _emit_request(self, request_url, resp, elapsed):
+        """Emit the ``request`` event of a response."""
+        retry = getattr(resp.raw, "retries", None)
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        self._emit(
+            "request",
+            url=request_url,
+            status=resp.status_code,
+            elapsed=elapsed,
+            retries=len(retry.history) if retry else 0,
+            rate_limited=is_rate_limited(resp),
+            rate_limit_remaining=int(remaining) if remaining is not None else None,
+        )
+
+    def _get_listing(self, endpoint, key=None, limit=None, params=None):
+        """Get the first page of a paginated endpoint, or its first items.
+
+        :param endpoint: API endpoint to call.
+        :type endpoint: str
+        :param key: Key holding the items, when the page is an object.
+        :type key: str
+        :param limit: Number of items to fetch, following the next pages as
+            needed. Without it, a single page of GitHub's default size is
+            fetched.
+        :type limit: int
+        :param params: Optional query parameters.
+        :type params: dict
+
+        :raises requests.exceptions.HTTPError: When response code is not successful.
+        :returns: The first page, holding the items fetched. The other fields
+            of an object page, like ``total_count``, are kept as GitHub sent
+            them.
+        """
+        if limit is None:
+            return self._get(endpoint, params=params)
+        request_url = "{0}/{1}".format(self.url, endpoint)
+        params = {"per_page": min(max(limit, 1), PER_PAGE), **(params or {})}
+        first, items = None, []
+        while first is None or (request_url and len(items) < limit):
+            page, request_url = self._get_page(request_url, params=params)
+            first = page if first is None else first
+            items.extend(page[key] if key else page)
+            # the next link already carries the query parameters
+            params = None
+        return {**first, key: items[:limit]} if key else items[:limit]
+
+    def _paginate(self, endpoint, key=None, params=None):
+        """Lazily iterate over the items of a paginated endpoint.
+
+        Pages of ``PER_PAGE`` items are requested one at a time by following
+        the ``Link: rel=next`` header, only when the caller needs them.
+
+        :param endpoint: API endpoint to call.
+        :type endpoint: str
+        :param key: Key holding the items, when the page is an object.
+        :type key: str
+        :param params: Optional query parameters.
+        :type params: dict
 
-    def _download(self, endpoint, destdir=None, filename=None):
+        :raises requests.exceptions.HTTPError: When response code is not successful.
+        """
+        request_url = "{0}/{1}".format(self.url, endpoint)
+        params = {"per_page": PER_PAGE, **(params or {})}
+        while request_url:
+            page, request_url = self._get_page(request_url, params=params)
+            yield from page[key] if key else page
+            # the next link already carries the query parameters
+            params = None
+
+    # pylint: disable=R0913
+    def _download(
+        self, endpoint, destdir=None, filename=None, sha256=None, source_id=None
+    ):
         """Downloads a file.
 
+        Data goes to ``<filename>.<source_id>.part``, renamed to ``filename``
+        once complete. If the connection drops or stalls, or if a ``.part``
+        file of the same source is left over from a previous run, the
+        download resumes where it stopped with a ``Range`` request, up to
+        ``RESUME_ATTEMPTS`` times.
+
         :param endpoint: Endpoint to download from.
         :param destdir: Optional destination directory.
         :param filename: Optional file name. Defaults to download.zip.
+        :param sha256: Optional expected SHA-256 of the file, computed while
+            streaming.
+        :param source_id: Optional ID of the downloaded file, e.g. the
+            artifact ID, so that a ``.part`` file left over by another file
+            of the same name is not resumed.
+
+        :raises requests.exceptions.HTTPError: When response code is not successful.
+        :raises GithubError: When the file does not match ``sha256``, or
+            when it is still incomplete after ``RESUME_ATTEMPTS`` attempts.
+        :returns: Path to the downloaded file.
         """
 
         if not filename:
             filename = "download.zip"
         if not destdir:
             destdir = os.getcwd()
-        auth = HTTPBasicAuth(self.token, "")
-        request_url = "{0}/{1}".format(self.url, endpoint)
-        resp = self._session.get(request_url, stream=True, auth=auth)
         path = "{0}/{1}".format(destdir, filename)
-        with open(path, "wb") as download_file:
-            for chunk in resp.iter_content(chunk_size=1024):
-                if chunk:
-                    download_file.write(chunk)
+        part_path = f"{path}.{source_id}.part" if source_id else f"{path}.part"
+        digest = hashlib.sha256() if sha256 else None
+        try:
+            with open(part_path, "r+b" if os.path.exists(part_path) else "w+b") as part:
+                digest = self._resume_download(endpoint, part, digest, sha256)
+        except requests.HTTPError as err:
+            # e.g. 404, the next run would not get further
+            if err.response is not None and err.response.status_code < 500:
+                os.remove(part_path)
+            raise
+        if digest:
+            try:
+                verify_sha256(digest, sha256)
+            except GithubError:
+                os.remove(part_path)
+                raise
+        os.replace(part_path, path)
         return path
+
+    def _resume_download(self, endpoint, part, digest, sha256):
+        """Completes a ``.part`` file, see ``_download``.
+
+        :param endpoint: Endpoint to download from.
+        :param part: ``.part`` file opened for reading and writing.
+        :param digest: Optional ``hashlib`` object, fed with the existing data.
+        :param sha256: Expected SHA-256, to start a new digest on restart.
+
+        :raises GithubError: When the file is still incomplete after
+            ``RESUME_ATTEMPTS`` attempts.
+        :returns: The digest of the whole file.
+        """
+        trim_zero_tail(part)
+        if digest:
+            part.seek(0)
+            hash_file(part, digest)
+        error = None
+        for _ in range(RESUME_ATTEMPTS + 1):
+            try:
+                self._download_to(
+                    endpoint, part, fallocate=True, digest=digest, resume=True
+                )
+                break
+            except RangeIgnoredError as err:
+                # start over from an empty file
+                part.seek(0)
+                part.truncate()
+                digest = hashlib.sha256() if sha256 else None
+                error = err
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+                urllib3.exceptions.HTTPError,
+                IncompleteDownloadError,
+            ) as err:
+                error = err
+        else:
+            raise IncompleteDownloadError(
+                f"Download of {endpoint} still incomplete after "
+                f"{RESUME_ATTEMPTS} resume attempts"
+            ) from error
+        part.truncate()
+        return digest
+
+    # pylint: disable=R0913
+    def _download_to(
+        self, endpoint, fileobj, fallocate=False, digest=None, resume=False
+    ):
+        """Streams a download into a file object.
+
+        :param endpoint: Endpoint to download from.
+        :param fileobj: Writable file object.
+        :param fallocate: Reserve disk space from ``Content-Length`` first.
+        :param digest: Optional ``hashlib`` object updated with the data.
+        :param resume: Request only the bytes after the current position of
+            ``fileobj``.
+
+        :raises requests.exceptions.HTTPError: When response code is not successful.
+        :raises IncompleteDownloadError: When fewer bytes than announced arrive.
+        :raises RangeIgnoredError: When resuming is not supported.
+        :returns: Number of bytes written.
+        """
+        auth = HTTPBasicAuth(self.token, "")
+        request_url = "{0}/{1}".format(self.url, endpoint)
+        offset = fileobj.tell() if resume else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+        started = time.perf_counter()
+        with self._send(request_url, stream=True, auth=auth, headers=headers) as resp:
+            if offset and resp.status_code == 416:
+                # nothing left to download
+                return 0
+            resp.raise_for_status()
+            if offset and resp.status_code != 206:
+                raise RangeIgnoredError(f"{request_url} does not support Range")
+            expected = int(resp.headers.get("Content-Length") or 0)
+            if fallocate:
+                preallocate(fileobj, expected)
+            encoded = resp.headers.get("Content-Encoding", "identity") != "identity"
+            written = write_body(resp, fileobj, encoded, digest=digest)
+            if self.hooks:
+                self._emit(
+                    "transfer",
+                    url=request_url,
+                    size=written,
+                    elapsed=time.perf_counter() - started,
+                )
+            # Content-Length of an encoded response is not the decoded size
+            if not encoded and expected and written < expected:
+                raise IncompleteDownloadError(
+                    f"Received {written} of {expected} bytes from {request_url}"
+                )
+            return written
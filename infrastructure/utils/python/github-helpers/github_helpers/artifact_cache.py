@@ -0,0 +1,170 @@
+"""
+GitHub Helpers artifact cache module
+
+Keeps downloaded artifact archives in a local directory keyed by artifact ID
+and digest, so that jobs fetching the same artifacts get them from disk
+instead of downloading them again.
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+
+DEFAULT_MAX_SIZE = 10 * 1024**3
+
+# Temporary files older than this are left over by killed processes
+STALE_TEMP_AGE = 24 * 3600
+
+
+def link_or_copy(src, dest):
+    """Materializes a file at another path as cheaply as possible.
+
+    Tries a hard link, then ``copy_file_range`` which lets filesystems
+    supporting it share the data (reflink), then a regular copy.
+
+    :param src: Existing file.
+    :param dest: Path to create, replaced if it exists.
+    """
+    tmp_dest = f"{dest}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(src, tmp_dest)
+    except OSError:
+        _copy(src, tmp_dest)
+    os.replace(tmp_dest, dest)
+
+
+def _copy(src, dest):
+    if not hasattr(os, "copy_file_range"):
+        shutil.copyfile(src, dest)
+        return
+    with open(src, "rb") as src_file, open(dest, "wb") as dest_file:
+        remaining = os.fstat(src_file.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(
+                    src_file.fileno(), dest_file.fileno(), remaining
+                )
+                if not copied:
+                    break
+                remaining -= copied
+        except OSError:
+            remaining = -1
+    if remaining:
+        shutil.copyfile(src, dest)
+
+
+class ArtifactCache:
+    """Size-bounded, content-addressed cache of artifact archives
+
+    Entries are named after the artifact ID and SHA-256 digest and are
+    written atomically, so several CLI processes can share the directory.
+    The least recently used entries are evicted once the directory grows
+    over ``max_size`` bytes.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        """Initialize the cache.
+
+        :param directory: Cache directory, created if missing.
+        :param max_size: Maximum total size of the entries, in bytes.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.bytes_from_cache = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"ArtifactCache(directory={self.directory!r}, max_size={self.max_size})"
+
+    def get(self, artifact_id, sha256=None):
+        """Get a cached archive and mark it as recently used.
+
+        :param artifact_id: Artifact ID.
+        :param sha256: Optional SHA-256 digest of the archive.
+        :returns: Path to the archive, or None.
+        """
+        path = self._path(artifact_id, sha256)
+        try:
+            os.utime(path)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_from_cache += size
+        return path
+
+    @staticmethod
+    def temp_name(artifact_id):
+        """File name, in the cache directory, to download an archive to.
+
+        Names are unique, so concurrent downloads of the same artifact do
+        not step on each other.
+
+        :param artifact_id: Artifact ID.
+        """
+        return f".{artifact_id}.{uuid.uuid4().hex}.zip"
+
+    def add(self, tmp_path, artifact_id, sha256=None):
+        """Move a downloaded archive into the cache.
+
+        :param tmp_path: Downloaded archive, in the cache directory.
+        :param artifact_id: Artifact ID.
+        :param sha256: Optional SHA-256 digest of the archive.
+        :returns: Path to the cached archive.
+        """
+        path = self._path(artifact_id, sha256)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits.
+
+        :param keep: Optional entry not to evict, e.g. the one just added.
+        """
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if name.startswith("."):
+                    if now - stat.st_mtime > STALE_TEMP_AGE:
+                        os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if name.endswith(".zip") and path != keep:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if keep and os.path.exists(keep):
+            total += os.path.getsize(keep)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def summary(self):
+        """Human readable statistics of the cache usage."""
+        return (
+            f"Artifact cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.bytes_from_cache / 2**20:.1f} MiB served from cache"
+        )
+
+    def _path(self, artifact_id, sha256=None):
+        name = str(artifact_id)
+        if sha256:
+            name = f"{name}-{sha256.lower().removeprefix('sha256:')}"
+        return os.path.join(self.directory, f"{name}.zip")
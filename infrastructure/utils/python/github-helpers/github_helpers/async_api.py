@@ -0,0 +1,425 @@
+"""
+GitHub Helpers asynchronous API module
+
+Same surface as ``github_helpers.api.GithubApi`` on top of ``httpx``, for
+fan-out jobs running many requests concurrently from a single thread.
+Requires the ``async`` extra: ``pip install github-helpers[async]``.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import tempfile
+import time
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+# pylint: disable=E0402
+from .api import (
+    LATEST_RUN_BATCH,
+    MAX_CHUNK_SIZE,
+    PER_PAGE,
+    RATE_LIMIT_RETRIES,
+    SECONDARY_RATE_LIMIT_WAIT,
+    SPOOL_MAX_SIZE,
+    GithubError,
+    extract_zip,
+    use_cached_archive,
+    verify_sha256,
+    workflow_runs_query,
+)
+from .ratelimit import RateLimiter, is_rate_limited
+
+
+# settings, retry policy, httpx client and the semaphore bounding it
+# pylint: disable=R0902
+class AsyncGithubApi:
+    """Asynchronous client for GitHub API
+
+    Usage::
+
+        async with AsyncGithubApi(token=token, owner=owner, repo=repo) as api:
+            runs = await api.get_workflow_runs("main")
+    """
+
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        token=None,
+        owner=None,
+        repo=None,
+        url="https://api.github.com",
+        concurrency=10,
+        retries=3,
+        backoff_factor=0.3,
+        status_forcelist=(408, 500, 502, 503, 504, 520, 521, 522, 523, 524),
+        rate_limiter=None,
+        artifact_cache=None,
+        hooks=None,
+    ):
+        """Initialize a client to interact with GitHub API.
+
+        :param token: GitHub API access token
+        :param url: The URL of the GitHub API instance
+        :param concurrency: Maximum number of requests in flight, streamed
+            downloads included, which is also the size of the connection pool
+        :param retries: Number of retries to allow
+        :param backoff_factor: Backoff factor to apply between attempts
+        :param status_forcelist: HTTP status codes to force a retry on
+        :param rate_limiter: Optional ``github_helpers.ratelimit.RateLimiter``
+        :param artifact_cache: Optional
+            ``github_helpers.artifact_cache.ArtifactCache``
+        :param hooks: Optional callables receiving the request and transfer
+            events, see ``github_helpers.stats``
+        """
+        if httpx is None:
+            raise GithubError(
+                "AsyncGithubApi requires httpx, install github-helpers[async]"
+            )
+        if not token:
+            raise GithubError("Missing or empty GitHub API access token")
+        self.token = token
+        if not owner or not repo:
+            raise GithubError("`owner` and `repo` must be defined for this request.")
+        self.owner = owner
+        self.repo = repo
+        self.url = url
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.artifact_cache = artifact_cache
+        self.hooks = list(hooks or ())
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            auth=(token, ""),
+            headers={"Accept": "application/vnd.github.v3+json"},
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            follow_redirects=True,
+            # requests wait for the semaphore, never for a pooled connection
+            timeout=httpx.Timeout(30.0, read=300.0, pool=None),
+        )
+
+    def __repr__(self):
+        opts = {
+            "token": self.token,
+            "url": self.url,
+        }
+        kwargs = [f"{k}={v!r}" for k, v in opts.items()]
+        return f'AsyncGithubApi({", ".join(kwargs)})'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self._client.aclose()
+
+    async def get_workflow_artifacts(self, run_id, limit=None):
+        """Get workflow artifacts.
+
+        Endpoint:
+            GET: ``/repos/{owner}/{repo}/actions/runs/{run_id}/artifacts``
+
+        Only the first page is fetched without `limit`, see
+        ``github_helpers.api.GithubApi.get_workflow_artifacts``.
+        """
+        endpoint = f"repos/{self.owner}/{self.repo}/actions/runs/{run_id}/artifacts"
+        return await self._get_listing(endpoint, key="artifacts", limit=limit)
+
+    def iter_workflow_artifacts(self, run_id):
+        """Lazily iterate over all workflow artifacts of a run."""
+        endpoint = f"repos/{self.owner}/{self.repo}/actions/runs/{run_id}/artifacts"
+        return self._paginate(endpoint, key="artifacts")
+
+    # pylint: disable=R0913
+    async def download_artifact(
+        self,
+        artifact_id,
+        destdir=None,
+        filename=None,
+        unzip=True,
+        members=None,
+        sha256=None,
+    ):
+        """Downloads artifact by its ID
+
+        See ``github_helpers.api.GithubApi.download_artifact``, downloads are
+        not resumable here.
+        """
+        endpoint = f"repos/{self.owner}/{self.repo}/actions/artifacts/{artifact_id}/zip"
+        digest = hashlib.sha256() if sha256 else None
+        if self.artifact_cache:
+            cached = self.artifact_cache.get(artifact_id, sha256)
+            if self.hooks:
+                self._emit("artifact_cache", hit=bool(cached))
+            if not cached:
+                tmp_path = os.path.join(
+                    self.artifact_cache.directory,
+                    self.artifact_cache.temp_name(artifact_id),
+                )
+                try:
+                    with open(tmp_path, "wb") as download_file:
+                        await self._download_to(endpoint, download_file, digest=digest)
+                    if digest:
+                        verify_sha256(digest, sha256)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+                cached = self.artifact_cache.add(tmp_path, artifact_id, sha256)
+            return await asyncio.to_thread(
+                use_cached_archive, cached, destdir, filename, unzip, members
+            )
+        if not destdir:
+            destdir = os.getcwd()
+        if not unzip:
+            path = "{0}/{1}".format(destdir, filename or "download.zip")
+            with open(path, "wb") as download_file:
+                await self._download_to(endpoint, download_file, digest=digest)
+            if digest:
+                verify_sha256(digest, sha256)
+            return path
+        with tempfile.SpooledTemporaryFile(
+            max_size=SPOOL_MAX_SIZE, dir=destdir
+        ) as spool:
+            await self._download_to(endpoint, spool, digest=digest)
+            if digest:
+                verify_sha256(digest, sha256)
+            spool.seek(0)
+            return await asyncio.to_thread(extract_zip, spool, destdir, members)
+
+    async def get_package_versions(
+        self, package_name, package_type="maven", limit=None
+    ):
+        """Get versions of a package at GitHub packages
+
+        Endpoint:
+            GET: ``/orgs/{org}/packages/{package_type}/{package_name}/versions``
+
+        Only the first page is fetched without `limit`.
+        """
+        endpoint = f"orgs/{self.owner}/packages/{package_type}/{package_name}/versions"
+        return await self._get_listing(endpoint, limit=limit)
+
+    def iter_package_versions(self, package_name, package_type="maven"):
+        """Lazily iterate over all versions of a package at GitHub packages"""
+        endpoint = f"orgs/{self.owner}/packages/{package_type}/{package_name}/versions"
+        return self._paginate(endpoint)
+
+    async def get_release_versions(self, limit=None):
+        """Get releases of the repository
+
+        Endpoint:
+            GET: ``/orgs/{owner}/{repo}/releases``
+
+        Only the first page is fetched without `limit`.
+        """
+        endpoint = f"repos/{self.owner}/{self.repo}/releases"
+        return await self._get_listing(endpoint, limit=limit)
+
+    def iter_release_versions(self):
+        """Lazily iterate over all releases of the repository"""
+        endpoint = f"repos/{self.owner}/{self.repo}/releases"
+        return self._paginate(endpoint)
+
+    # pylint: disable=R0913
+    async def get_workflow_runs(
+        self, branch=None, limit=None, status=None, event=None, workflow=None
+    ):
+        """Get workflow runs
+
+        Endpoint:
+            GET ``/repos/{owner}/{repo}/actions/runs``
+
+        Only the first page is fetched without `limit`.
+        """
+        endpoint, params = workflow_runs_query(
+            self.owner, self.repo, branch, status, event, workflow
+        )
+        return await self._get_listing(
+            endpoint, key="workflow_runs", limit=limit, params=params
+        )
+
+    def iter_workflow_runs(self, branch=None, status=None, event=None, workflow=None):
+        """Lazily iterate over workflow runs, most recent first"""
+        endpoint, params = workflow_runs_query(
+            self.owner, self.repo, branch, status, event, workflow
+        )
+        return self._paginate(endpoint, key="workflow_runs", params=params)
+
+    async def find_latest_run_artifacts(self, batch_size=LATEST_RUN_BATCH, **filters):
+        """Get artifacts of the most recent workflow run having some.
+
+        See ``github_helpers.api.GithubApi.find_latest_run_artifacts``.
+        """
+        runs = self.iter_workflow_runs(**filters)
+        try:
+            while True:
+                batch = await _collect_batch(runs, batch_size)
+                if not batch:
+                    return {}
+                for artifacts in await asyncio.gather(
+                    *(
+                        _collect(self.iter_workflow_artifacts(run["id"]))
+                        for run in batch
+                    )
+                ):
+                    if artifacts:
+                        return {"total_count": len(artifacts), "artifacts": artifacts}
+        finally:
+            await runs.aclose()
+
+    async def _get_listing(self, endpoint, key=None, limit=None, params=None):
+        """Get the first page of a paginated endpoint, or its first items.
+
+        See ``github_helpers.api.GithubApi._get_listing``.
+        """
+        request_url = "{0}/{1}".format(self.url, endpoint)
+        if limit is not None:
+            params = {"per_page": min(max(limit, 1), PER_PAGE), **(params or {})}
+        first, items = None, []
+        while first is None or (request_url and len(items) < limit):
+            resp = await self._send(request_url, params=params)
+            resp.raise_for_status()
+            page = resp.json()
+            if limit is None:
+                return page
+            first = page if first is None else first
+            items.extend(page[key] if key else page)
+            # the next link already carries the query parameters
+            request_url = resp.links.get("next", {}).get("url")
+            params = None
+        return {**first, key: items[:limit]} if key else items[:limit]
+
+    async def _paginate(self, endpoint, key=None, params=None):
+        """Lazily iterate over the items of a paginated endpoint."""
+        request_url = "{0}/{1}".format(self.url, endpoint)
+        params = {"per_page": PER_PAGE, **(params or {})}
+        while request_url:
+            resp = await self._send(request_url, params=params)
+            resp.raise_for_status()
+            page = resp.json()
+            for item in page[key] if key else page:
+                yield item
+            # the next link already carries the query parameters
+            request_url = resp.links.get("next", {}).get("url")
+            params = None
+
+    async def _download_to(self, endpoint, fileobj, digest=None):
+        """Streams a download into a file object.
+
+        The download counts against ``concurrency`` until the whole body is
+        received, not only until the response headers.
+        """
+        async with self._semaphore:
+            return await self._stream_to(endpoint, fileobj, digest=digest)
+
+    async def _stream_to(self, endpoint, fileobj, digest=None):
+        request_url = "{0}/{1}".format(self.url, endpoint)
+        started = time.perf_counter()
+        resp = await self._send(request_url, stream=True, acquired=True)
+        try:
+            resp.raise_for_status()
+            written = 0
+            async for chunk in resp.aiter_bytes(MAX_CHUNK_SIZE):
+                written += fileobj.write(chunk)
+                if digest:
+                    digest.update(chunk)
+            if self.hooks:
+                self._emit(
+                    "transfer",
+                    url=request_url,
+                    size=written,
+                    elapsed=time.perf_counter() - started,
+                )
+            return written
+        finally:
+            await resp.aclose()
+
+    async def _send(self, request_url, params=None, stream=False, acquired=False):
+        """Send a GET HTTP request with the retries of ``GithubApi``.
+
+        Server errors and connection errors are retried with an exponential
+        backoff, rate limited responses wait for the shared rate limiter.
+
+        :param acquired: The caller already holds the concurrency semaphore.
+        :returns: The response, to be closed by the caller when streamed.
+        """
+        errors = rate_limited = 0
+        while True:
+            await asyncio.to_thread(self.rate_limiter.acquire)
+            async with contextlib.nullcontext() if acquired else self._semaphore:
+                request = self._client.build_request("GET", request_url, params=params)
+                started = time.perf_counter()
+                try:
+                    resp = await self._client.send(request, stream=stream)
+                except httpx.TransportError:
+                    if errors >= self.retries:
+                        raise
+                    errors += 1
+                    await asyncio.sleep(self._backoff(errors))
+                    continue
+            self.rate_limiter.update(resp.headers)
+            if self.hooks:
+                remaining = resp.headers.get("X-RateLimit-Remaining")
+                self._emit(
+                    "request",
+                    url=request_url,
+                    status=resp.status_code,
+                    elapsed=time.perf_counter() - started,
+                    # every attempt is an event of its own here
+                    retries=1 if errors else 0,
+                    rate_limited=is_rate_limited(resp),
+                    rate_limit_remaining=(
+                        int(remaining) if remaining is not None else None
+                    ),
+                )
+            if is_rate_limited(resp) and rate_limited < RATE_LIMIT_RETRIES:
+                remaining = resp.headers.get("X-RateLimit-Remaining")
+                if "Retry-After" not in resp.headers and remaining != "0":
+                    self.rate_limiter.block(SECONDARY_RATE_LIMIT_WAIT * 2**rate_limited)
+                rate_limited += 1
+                await resp.aclose()
+                continue
+            if resp.status_code in self.status_forcelist and errors < self.retries:
+                errors += 1
+                await resp.aclose()
+                await asyncio.sleep(self._backoff(errors))
+                continue
+            return resp
+
+    def _emit(self, event, **data):
+        """Call the hooks with an event, see ``github_helpers.stats``."""
+        for hook in self.hooks:
+            hook(event, **data)
+
+    def _backoff(self, attempt):
+        # same formula as urllib3.Retry
+        return 0 if attempt < 2 else self.backoff_factor * 2 ** (attempt - 1)
+
+
+async def _collect_batch(items, size):
+    """Takes the next `size` items of an async iterator, left open."""
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            break
+    return batch
+
+
+async def _collect(items):
+    """Collects the items of an async iterator into a list."""
+    try:
+        return [item async for item in items]
+    finally:
+        await items.aclose()
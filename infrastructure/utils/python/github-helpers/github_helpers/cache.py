@@ -0,0 +1,112 @@
+"""
+GitHub Helpers response cache module
+
+Responses of GET requests are kept on disk with their ETag, so that repeated
+calls can be revalidated with ``If-None-Match``. GitHub answers ``304 Not
+Modified`` to those, which does not count against the rate limit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+class ResponseCache:
+    """Size-bounded on-disk cache of API responses
+
+    Every entry is a separate file written atomically, so several CLI
+    processes can share the same directory. The least recently used entries
+    are evicted once the directory grows over ``max_size`` bytes.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        """Initialize the cache.
+
+        :param directory: Cache directory, created if missing.
+        :param max_size: Maximum total size of the entries, in bytes.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"ResponseCache(directory={self.directory!r}, max_size={self.max_size})"
+
+    def get(self, key):
+        """Get an entry and mark it as recently used.
+
+        :param key: Cache key, usually the request URL.
+        :returns: Dict with ``etag``, ``body`` and ``next`` keys, or None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as entry_file:
+                entry = json.load(entry_file)
+            os.utime(path)
+        except (OSError, ValueError):
+            # missing, evicted meanwhile by another process or corrupted
+            return None
+        return entry
+
+    def put(self, key, etag, body, next_url=None):
+        """Store an entry.
+
+        :param key: Cache key, usually the request URL.
+        :param etag: ETag of the response.
+        :param body: JSON body of the response.
+        :param next_url: URL of the next page, if any.
+        """
+        entry = {"etag": etag, "body": body, "next": next_url}
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as entry_file:
+                json.dump(entry, entry_file)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def record(self, hit):
+        """Count a cache hit or miss.
+
+        :param hit: Whether the response was served from the cache.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
@@ -3,10 +3,16 @@ GitHub helpers for CI/CD scripts
 
 Following actions are available:
 * Getting latest version of a package from GitHub packages
+* Getting latest versions of many packages at once
 * Downloading arts from GitHub Actions pipelines
+
+Modules needed by a single command, and the GitHub API client with its
+HTTP session, are loaded on first use: the CLI is started many times per
+pipeline and ``--help`` or a version lookup should not pay for them.
 """
 
 import dataclasses
+import json
 import logging
 import sys
 
@@ -14,7 +20,9 @@ import sys
 import click
 
 # pylint: disable=E0402
-from .api import GithubApi
+from .stats import RequestStats
+
+GITHUB_API_URL = "https://api.github.com"
 
 
 @dataclasses.dataclass
@@ -43,11 +51,15 @@ def init_logger():
     return logger
 
 
-# pylint: disable=R0903
+# options of the group plus the lazily created client, cache and stats
+# pylint: disable=R0902,R0903
 class Globals:
     """Global variables to share between entry points"""
 
-    def __init__(self, token, owner, repo):
+    # pylint: disable=R0913
+    def __init__(
+        self, token, owner, repo, url=GITHUB_API_URL, cache_dir=None, stats=None
+    ):
         """Default constructor
 
         :param token: GitHub API token
@@ -56,14 +68,64 @@ class Globals:
         :type owner: str
         :param repo: GitHub repository name
         :type repo: str
+        :param url: GitHub API URL
+        :type url: str
+        :param cache_dir: Optional directory of the response cache
+        :type cache_dir: str
+        :param stats: Optional format of the statistics summary
+        :type stats: str
         """
-        self.api = GithubApi(token=token, owner=owner, repo=repo)
+        self.token = token
+        self.owner = owner
+        self.repo = repo
+        self.url = url
+        self.cache_dir = cache_dir
+        self.cache = None
+        self.stats = RequestStats() if stats else None
+        self._api = None
         self.logger = init_logger()
 
+    @property
+    def api(self):
+        """GitHub API client, created on first use
+
+        :rtype: github_helpers.api.GithubApi
+        """
+        if self._api is None:
+            # pylint: disable=C0415
+            from .api import GithubApi
+            from .cache import ResponseCache
+
+            self.cache = ResponseCache(self.cache_dir) if self.cache_dir else None
+            self._api = GithubApi(
+                token=self.token,
+                owner=self.owner,
+                repo=self.repo,
+                url=self.url,
+                cache=self.cache,
+                hooks=[self.stats] if self.stats else None,
+            )
+        return self._api
+
+    def report_cache(self):
+        """Logs response cache hits and misses"""
+        if self.cache:
+            self.logger.info(
+                "Response cache: %d hits, %d misses",
+                self.cache.hits,
+                self.cache.misses,
+            )
+
+    def report_stats(self):
+        """Prints the statistics summary to stderr"""
+        if self.stats:
+            click.echo(json.dumps(self.stats.summary(), indent=2), err=True)
+
 
 pass_globals = click.make_pass_decorator(Globals)
 
 
+# pylint: disable=R0913
 @click.group()
 @click.option(
     "--token",
@@ -84,8 +146,29 @@ pass_globals = click.make_pass_decorator(Globals)
     metavar="REPOSITORY",
     help="GitHub repo(project).",
 )
+@click.option(
+    "--api-url",
+    envvar="GITHUB_API_URL",
+    default=GITHUB_API_URL,
+    show_default=True,
+    metavar="URL",
+    help="GitHub API URL, e.g. of a GitHub Enterprise Server.",
+)
+@click.option(
+    "--cache-dir",
+    envvar="GITHUB_HELPERS_CACHE_DIR",
+    metavar="DIR",
+    default=None,
+    help="Directory to cache API responses in, shared between runs.",
+)
+@click.option(
+    "--stats",
+    type=click.Choice(["json"]),
+    default=None,
+    help="Print request statistics to stderr at the end of the command.",
+)
 @click.pass_context
-def cli(ctx, token, owner, repo):
+def cli(ctx, token, owner, repo, api_url, cache_dir, stats):
     """Command line interface entry point
     \f
 
@@ -97,10 +180,19 @@ def cli(ctx, token, owner, repo):
     :type owner: str
     :param repo: GitHub repository name
     :type repo: str
+    :param api_url: GitHub API URL
+    :type api_url: str
+    :param cache_dir: Directory of the response cache
+    :type cache_dir: str
+    :param stats: Format of the statistics summary
+    :type stats: str
     """
-    ctx.obj = Globals(token, owner, repo)
+    ctx.obj = Globals(token, owner, repo, url=api_url, cache_dir=cache_dir, stats=stats)
+    ctx.call_on_close(ctx.obj.report_cache)
+    ctx.call_on_close(ctx.obj.report_stats)
 
 
+# pylint: disable=R0913
 @cli.command()
 @click.option(
     "--package",
@@ -114,8 +206,30 @@ def cli(ctx, token, owner, repo):
     metavar="TYPE",
     help="Package type.",
 )
+@click.option(
+    "--prefix",
+    default="",
+    metavar="PREFIX",
+    help="Only consider versions starting with PREFIX, e.g. 'cloud-agent-v'.",
+)
+@click.option(
+    "--exclude-prerelease",
+    is_flag=True,
+    default=False,
+    help="Skip pre-release, RC and snapshot versions.",
+)
+@click.option(
+    "--first-match",
+    is_flag=True,
+    default=False,
+    help="Stop listing versions at the first page with a match, when there "
+    "is no response cache. Faster, but the result may not be the highest "
+    "version if older ones are listed first.",
+)
 @pass_globals
-def get_latest_package_version(ctx, package, package_type):
+def get_latest_package_version(
+    ctx, package, package_type, prefix, exclude_prerelease, first_match
+):
     """Gets latest version of package
     \f
 
@@ -125,40 +239,409 @@ def get_latest_package_version(ctx, package, package_type):
     :type package: str
     :param package_type: Package type
     :type package_type: str
+    :param prefix: Prefix of the versions to consider
+    :type prefix: str
+    :param exclude_prerelease: Skip pre-releases
+    :type exclude_prerelease: bool
+    :param first_match: Stop listing at the first match, maybe partially
+    :type first_match: bool
     """
-    versions = ctx.api.get_package_versions(package, package_type=package_type)
-    if not versions:
+    index = ctx.api.get_package_version_index(
+        package,
+        package_type=package_type,
+        until=latest_is_known(prefix, exclude_prerelease) if first_match else None,
+    )
+    if not index:
         ctx.logger.error(
             f"Specified package {package} doesn't exist." "Versions list is empty."
         )
         sys.exit(Errors.EMPTY_VERSIONS_LIST)
     else:
+        print(latest_version(index, prefix, exclude_prerelease) or "NOT EXIST")
+
+
+def latest_version(index, prefix="", exclude_prerelease=False):
+    """Gets the highest version of an index
+
+    Without filters, falls back to the most recent name when none of them
+    is a semantic version.
+
+    :param index: Version names sorted by semver
+    :type index: github_helpers.versions.VersionIndex
+    :param prefix: Prefix of the versions to consider
+    :type prefix: str
+    :param exclude_prerelease: Skip pre-releases
+    :type exclude_prerelease: bool
+    :return: Version name or None
+    :rtype: str
+    """
+    latest = index.latest(prefix=prefix, exclude_prerelease=exclude_prerelease)
+    if latest is None and not prefix and not exclude_prerelease and index.names:
+        return index.names[0]
+    return latest
+
+
+def latest_is_known(prefix="", exclude_prerelease=False):
+    """Predicate telling that an index holds a version matching the filters
+
+    GitHub lists the most recent versions first, so with ``--first-match``
+    and without a cache to keep the whole index, listing stops at the first
+    page answering. The index is then partial: a higher version listed on
+    a later page is missed.
+
+    :param prefix: Prefix of the versions to consider
+    :type prefix: str
+    :param exclude_prerelease: Skip pre-releases
+    :type exclude_prerelease: bool
+    :return: Function of a `github_helpers.versions.VersionIndex`
+    """
+    return lambda index: (
+        index.latest(prefix=prefix, exclude_prerelease=exclude_prerelease) is not None
+    )
+
+
+def parse_packages(packages, packages_file, package_type):
+    """Collects `(package, package_type)` pairs from arguments and a file
+
+    :param packages: `PACKAGE[:TYPE]` arguments
+    :type packages: tuple
+    :param packages_file: Optional file with one `PACKAGE [TYPE]` per line
+    :type packages_file: io.TextIOBase
+    :param package_type: Type of the packages given without one
+    :type package_type: str
+    :return: Pairs of package name and type
+    :rtype: list
+    """
+    pairs = []
+    for package in packages:
+        name, _, ptype = package.partition(":")
+        pairs.append((name, ptype or package_type))
+    for line in packages_file or ():
+        fields = line.split("#")[0].split()
+        if fields:
+            pairs.append((fields[0], fields[1] if len(fields) > 1 else package_type))
+    return pairs
+
+
+# pylint: disable=R0913
+@cli.command()
+@click.argument("packages", nargs=-1, metavar="[PACKAGE[:TYPE]]...")
+@click.option(
+    "--file",
+    "packages_file",
+    type=click.File("r"),
+    default=None,
+    help="File with one 'PACKAGE [TYPE]' per line, '-' for stdin.",
+)
+@click.option(
+    "--package-type",
+    default="maven",
+    metavar="TYPE",
+    help="Type of the packages given without one.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["json", "tsv"]),
+    default="json",
+    show_default=True,
+    help="Output format.",
+)
+@click.option(
+    "--jobs",
+    metavar="N",
+    default=8,
+    type=click.IntRange(min=1),
+    help="Number of packages to resolve concurrently.",
+)
+@click.option(
+    "--prefix",
+    default="",
+    metavar="PREFIX",
+    help="Only consider versions starting with PREFIX, e.g. 'cloud-agent-v'.",
+)
+@click.option(
+    "--exclude-prerelease",
+    is_flag=True,
+    default=False,
+    help="Skip pre-release, RC and snapshot versions.",
+)
+@click.option(
+    "--first-match",
+    is_flag=True,
+    default=False,
+    help="Stop listing versions at the first page with a match, when there "
+    "is no response cache. Faster, but the result may not be the highest "
+    "version if older ones are listed first.",
+)
+@pass_globals
+def get_latest_package_versions(
+    ctx,
+    packages,
+    packages_file,
+    package_type,
+    output_format,
+    jobs,
+    prefix,
+    exclude_prerelease,
+    first_match,
+):
+    """Gets latest versions of many packages at once
+    \f
+
+    :param ctx: Shared context
+    :type ctx: github_helpers.click_main.Globals
+    :param packages: `PACKAGE[:TYPE]` arguments
+    :type packages: tuple
+    :param packages_file: File with one `PACKAGE [TYPE]` per line
+    :type packages_file: io.TextIOBase
+    :param package_type: Type of the packages given without one
+    :type package_type: str
+    :param output_format: json or tsv
+    :type output_format: str
+    :param jobs: Number of concurrent lookups
+    :type jobs: int
+    :param prefix: Prefix of the versions to consider
+    :type prefix: str
+    :param exclude_prerelease: Skip pre-releases
+    :type exclude_prerelease: bool
+    :param first_match: Stop listing at the first match, maybe partially
+    :type first_match: bool
+    """
+    # pylint: disable=C0415
+    from concurrent.futures import ThreadPoolExecutor
+
+    import requests
+
+    pairs = parse_packages(packages, packages_file, package_type)
+
+    def resolve(pair):
+        name, ptype = pair
+        result = {"package": name, "package_type": ptype, "version": None}
         try:
-            if package_type == 'container':
-                print(versions[0].get("metadata").get("container").get("tags")[0])
-            else:
-                print(versions[0].get("name", "NOT EXIST"))
-        except IndexError:
-            print("NOT EXIST")
+            index = ctx.api.get_package_version_index(
+                name,
+                package_type=ptype,
+                until=(
+                    latest_is_known(prefix, exclude_prerelease) if first_match else None
+                ),
+            )
+        except requests.RequestException as err:
+            ctx.logger.error("Unable to get versions of package %s: %s", name, err)
+            return result
+        result["version"] = latest_version(index, prefix, exclude_prerelease)
+        return result
+
+    ctx.api.set_pool_size(jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(resolve, pairs))
+    print_versions(results, output_format)
+    if not all(result["version"] for result in results):
+        sys.exit(Errors.EMPTY_VERSIONS_LIST)
+
+
+def print_versions(results, output_format):
+    """Prints the resolved versions of packages
+
+    :param results: `package`, `package_type` and `version` of each package
+    :type results: list
+    :param output_format: json or tsv
+    :type output_format: str
+    """
+    if output_format == "json":
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(
+            f"{result['package']}\t{result['package_type']}\t"
+            f"{result['version'] or ''}"
+        )
 
 
 @cli.command()
+@click.option(
+    "--prefix",
+    default="",
+    metavar="PREFIX",
+    help="Only consider versions starting with PREFIX, e.g. 'cloud-agent-v'.",
+)
+@click.option(
+    "--exclude-prerelease",
+    is_flag=True,
+    default=False,
+    help="Skip pre-release, RC and snapshot versions.",
+)
+@click.option(
+    "--first-match",
+    is_flag=True,
+    default=False,
+    help="Stop listing versions at the first page with a match, when there "
+    "is no response cache. Faster, but the result may not be the highest "
+    "version if older ones are listed first.",
+)
 @pass_globals
-def get_latest_release_version(ctx):
+def get_latest_release_version(ctx, prefix, exclude_prerelease, first_match):
     """Gets latest version of the release
     \f
 
     :param ctx: Shared context
     :type ctx: github_helpers.click_main.Globals
+    :param prefix: Prefix of the tags to consider
+    :type prefix: str
+    :param exclude_prerelease: Skip pre-releases
+    :type exclude_prerelease: bool
+    :param first_match: Stop listing at the first match, maybe partially
+    :type first_match: bool
     """
-    versions = ctx.api.get_release_versions()
-    if not versions:
+    index = ctx.api.get_release_version_index(
+        until=latest_is_known(prefix, exclude_prerelease) if first_match else None
+    )
+    if not index:
         ctx.logger.error("Releases list is empty.")
         sys.exit(Errors.EMPTY_VERSIONS_LIST)
     else:
-        print(versions[0].get("tag_name", "NOT EXIST"))
+        print(latest_version(index, prefix, exclude_prerelease) or "NOT EXIST")
+
+
+def artifact_sha256(artifact):
+    """Gets the SHA-256 of an artifact archive, when GitHub provides it
+
+    :param artifact: Artifact as returned by GitHub API
+    :type artifact: dict
+    :return: Hex digest or None
+    :rtype: str
+    """
+    digest = artifact.get("digest") or ""
+    return digest if digest.startswith("sha256:") else None
+
 
+# pylint: disable=R0913
+def download_artifacts(ctx, artifacts, dest_dir, jobs=1, members=None, resume=False):
+    """Downloads artifacts using a pool of `jobs` workers
+
+    A failed download is reported and does not cancel the other ones.
+
+    :param ctx: Shared context
+    :type ctx: github_helpers.click_main.Globals
+    :param artifacts: Artifacts as returned by GitHub API
+    :type artifacts: list
+    :param dest_dir: Download destination directory
+    :type dest_dir: str
+    :param jobs: Number of concurrent downloads
+    :type jobs: int
+    :param members: Glob patterns of archive members to extract
+    :type members: tuple
+    :param resume: Download through resumable .part files
+    :type resume: bool
+    :return: Names of the artifacts which failed to download
+    :rtype: list
+    """
+    # pylint: disable=C0415
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    ctx.api.set_pool_size(jobs)
+    failed = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                ctx.api.download_artifact,
+                art.get("id"),
+                filename=f"{art.get('name')}.zip",
+                destdir=dest_dir,
+                members=members,
+                sha256=artifact_sha256(art),
+                resume=resume,
+            ): art.get("name")
+            for art in artifacts
+        }
+        for future in as_completed(futures):
+            artifact_name = futures[future]
+            try:
+                future.result()
+            except download_errors() as err:
+                ctx.logger.error(
+                    "Unable to download artifact '%s': %s", artifact_name, err
+                )
+                failed.append(artifact_name)
+            else:
+                ctx.logger.info("Downloaded artifact '%s'", artifact_name)
+    return failed
+
+
+def download_errors():
+    """Exceptions failing the download of a single artifact
+
+    Imported on first use, like the API client.
+
+    :return: Exception classes
+    :rtype: tuple
+    """
+    # pylint: disable=C0415
+    import zipfile
+
+    import requests
+    import urllib3
+
+    from .api import GithubError
+
+    return (
+        requests.RequestException,
+        urllib3.exceptions.HTTPError,
+        OSError,
+        zipfile.BadZipFile,
+        GithubError,
+    )
 
+
+def download_artifacts_async(ctx, artifacts, dest_dir, jobs=1, members=None):
+    """Downloads artifacts concurrently with ``AsyncGithubApi``
+
+    Same contract as ``download_artifacts``, without `resume`.
+    """
+    # pylint: disable=C0415
+    import asyncio
+
+    from .async_api import AsyncGithubApi
+
+    async def download_all():
+        async with AsyncGithubApi(
+            token=ctx.api.token,
+            owner=ctx.api.owner,
+            repo=ctx.api.repo,
+            url=ctx.api.url,
+            concurrency=jobs,
+            rate_limiter=ctx.api.rate_limiter,
+            artifact_cache=ctx.api.artifact_cache,
+            hooks=ctx.api.hooks,
+        ) as api:
+            return await asyncio.gather(
+                *(
+                    api.download_artifact(
+                        art.get("id"),
+                        filename=f"{art.get('name')}.zip",
+                        destdir=dest_dir,
+                        members=members,
+                        sha256=artifact_sha256(art),
+                    )
+                    for art in artifacts
+                ),
+                return_exceptions=True,
+            )
+
+    failed = []
+    for art, result in zip(artifacts, asyncio.run(download_all())):
+        artifact_name = art.get("name")
+        if isinstance(result, Exception):
+            ctx.logger.error(
+                "Unable to download artifact '%s': %s", artifact_name, result
+            )
+            failed.append(artifact_name)
+        else:
+            ctx.logger.info("Downloaded artifact '%s'", artifact_name)
+    return failed
+
+
+# pylint: disable=R0913,R0914
 @cli.command()
 @click.option(
     "--run-id",
@@ -178,8 +661,74 @@ def get_latest_release_version(ctx):
     default="master",
     help="GitHub branch to search for latest artifacts.",
 )
+@click.option(
+    "--workflow",
+    metavar="WORKFLOW",
+    default=None,
+    help="Workflow file name or ID to search for latest artifacts, e.g. build.yml.",
+)
+@click.option(
+    "--status",
+    metavar="STATUS",
+    default="success",
+    show_default=True,
+    help="Status of the runs to search for latest artifacts, '' for any.",
+)
+@click.option(
+    "--event",
+    metavar="EVENT",
+    default=None,
+    help="Event of the runs to search for latest artifacts, e.g. push.",
+)
+@click.option(
+    "--jobs",
+    metavar="N",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of artifacts to download concurrently.",
+)
+@click.option(
+    "--member",
+    "members",
+    metavar="PATTERN",
+    multiple=True,
+    help="Extract only archive members matching the glob, e.g. '*.apk'.",
+)
+@click.option(
+    "--async",
+    "use_async",
+    is_flag=True,
+    default=False,
+    help="Download with asyncio instead of threads (requires httpx).",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Keep interrupted downloads as .part files and resume them.",
+)
+@click.option(
+    "--artifact-cache",
+    envvar="GITHUB_HELPERS_ARTIFACT_CACHE",
+    metavar="DIR",
+    default=None,
+    help="Directory to cache artifact archives in, shared between runs.",
+)
 @pass_globals
-def download_arts(ctx, run_id, dest_dir, branch):
+def download_arts(
+    ctx,
+    run_id,
+    dest_dir,
+    branch,
+    workflow,
+    status,
+    event,
+    jobs,
+    members,
+    use_async,
+    resume,
+    artifact_cache,
+):
     """Downloads artifacts from GitHub
     \f
 
@@ -191,26 +740,71 @@ def download_arts(ctx, run_id, dest_dir, branch):
     :type dest_dir: str
     :param branch: Branch for latest arts download
     :type branch: str
+    :param workflow: Workflow for latest arts download
+    :type workflow: str
+    :param status: Run status for latest arts download
+    :type status: str
+    :param event: Run event for latest arts download
+    :type event: str
+    :param jobs: Number of concurrent downloads
+    :type jobs: int
+    :param members: Glob patterns of archive members to extract
+    :type members: tuple
+    :param use_async: Download with AsyncGithubApi
+    :type use_async: bool
+    :param resume: Download through resumable .part files
+    :type resume: bool
+    :param artifact_cache: Directory of the artifact cache
+    :type artifact_cache: str
     """
+    if use_async and resume:
+        raise click.UsageError("--resume is not supported with --async")
+    if artifact_cache:
+        # pylint: disable=C0415
+        from .artifact_cache import ArtifactCache
+
+        ctx.api.artifact_cache = ArtifactCache(artifact_cache)
+        click.get_current_context().call_on_close(
+            lambda: ctx.logger.info(ctx.api.artifact_cache.summary())
+        )
     ctx.logger.info(
         "Downloading artifacts for " f"run_id='{run_id}' and branch='{branch}'"
     )
+    # pylint: disable=C0415
+    import requests
+
     wf_artifacts = {}
-    if run_id in ("latest", ""):
-        wf_runs = ctx.api.get_workflow_runs(branch)
-        for run in wf_runs["workflow_runs"]:
-            wf_artifacts = ctx.api.get_workflow_artifacts(run["id"])
-            if wf_artifacts.get("total_count", 0) > 0:
-                break
-    else:
-        wf_artifacts = ctx.api.get_workflow_artifacts(run_id)
+    try:
+        if run_id in ("latest", ""):
+            wf_artifacts = ctx.api.find_latest_run_artifacts(
+                branch=branch, status=status, event=event, workflow=workflow
+            )
+        else:
+            artifacts = list(ctx.api.iter_workflow_artifacts(run_id))
+            wf_artifacts = {"total_count": len(artifacts), "artifacts": artifacts}
+    except requests.RequestException as err:
+        ctx.logger.error(
+            f"Unable to list artifacts for run_id='{run_id}' and branch='{branch}': "
+            f"{err}"
+        )
+        sys.exit(Errors.UNABLE_TO_DOWNLOAD)
     if wf_artifacts.get("total_count", 0) > 0:
-        for art in wf_artifacts["artifacts"]:
-            artifact_id = art.get("id")
-            artifact_name = art.get("name")
-            ctx.api.download_artifact(
-                artifact_id, filename=f"{artifact_name}.zip", destdir=dest_dir
+        if use_async:
+            failed = download_artifacts_async(
+                ctx, wf_artifacts["artifacts"], dest_dir, jobs=jobs, members=members
+            )
+        else:
+            failed = download_artifacts(
+                ctx,
+                wf_artifacts["artifacts"],
+                dest_dir,
+                jobs=jobs,
+                members=members,
+                resume=resume,
             )
+        if failed:
+            ctx.logger.error(f"Failed to download artifacts: {', '.join(failed)}")
+            sys.exit(Errors.UNABLE_TO_DOWNLOAD)
     else:
         ctx.logger.error(
             "No runs with artifacts found for "
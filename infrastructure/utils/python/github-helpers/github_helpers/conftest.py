@@ -0,0 +1,37 @@
+"""Shared fixtures of the GitHub helpers tests"""
+
+from contextlib import ExitStack
+
+import pytest
+
+# pylint: disable=E0402
+from .api import GithubApi
+from .fake_github import FakeGithub
+
+
+@pytest.fixture(name="fake_github")
+def fixture_fake_github():
+    """Factory of fake GitHub APIs, stopped at the end of the test
+
+    Takes the options of ``github_helpers.fake_github.FakeGithub``.
+    """
+    with ExitStack() as stack:
+        yield lambda **options: stack.enter_context(FakeGithub(**options))
+
+
+@pytest.fixture(name="fake_api")
+def fixture_fake_api(fake_github):
+    """Factory of ``GithubApi`` clients of a fake GitHub API
+
+    Takes the options of ``FakeGithub``, and the ones of the client as
+    ``api_options``. Returns the fake API and its client.
+    """
+
+    def start(api_options=None, **options):
+        github = fake_github(**options)
+        api = GithubApi(
+            token="fake", owner="o", repo="r", url=github.url, **(api_options or {})
+        )
+        return github, api
+
+    return start
@@ -0,0 +1,317 @@
+"""
+Local stand-in for the GitHub API
+
+Serves just enough of the REST API for the helpers to be exercised offline,
+in tests and benchmarks.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# pylint: disable=E0402
+from .api import MAX_CHUNK_SIZE
+
+
+def make_zip(files, compression=zipfile.ZIP_DEFLATED):
+    """Builds a zip archive in memory.
+
+    :param files: Member contents by member name.
+    :type files: dict
+    :param compression: ``zipfile`` compression method.
+    :returns: Archive bytes.
+    """
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=compression) as zip_ref:
+        for name, content in files.items():
+            zip_ref.writestr(name, content)
+    return buf.getvalue()
+
+
+def make_large_zip(size, name="app-debug.apk"):
+    """Builds an archive of about `size` bytes of incompressible data.
+
+    :param size: Size of the single member, in bytes.
+    :param name: Name of the member.
+    :returns: Archive bytes.
+    """
+    return make_zip({name: os.urandom(size)}, compression=zipfile.ZIP_STORED)
+
+
+# Silence of a stalled artifact download before its connection is dropped
+STALL_SECONDS = 2
+
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    """Request handler of the fake GitHub API"""
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, do not wait for delayed ACKs
+    disable_nagle_algorithm = True
+    routes = (
+        (r"/repos/[^/]+/[^/]+/actions/runs", "runs"),
+        (r"/repos/[^/]+/[^/]+/actions/workflows/(?P<workflow>[^/]+)/runs", "runs"),
+        (r"/repos/[^/]+/[^/]+/actions/runs/(?P<run_id>\d+)/artifacts", "run_artifacts"),
+        (r"/repos/[^/]+/[^/]+/actions/artifacts/(?P<artifact_id>\d+)/zip", "artifact"),
+        (r"/repos/[^/]+/[^/]+/releases", "releases"),
+        (
+            r"/orgs/[^/]+/packages/(?P<package_type>[^/]+)/(?P<package_name>[^/]+)"
+            r"/versions",
+            "package_versions",
+        ),
+    )
+
+    def __init__(self, *args, **kwargs):
+        # the request is served by the base constructor, set state first
+        self.query = {}
+        self.close_connection = True
+        super().__init__(*args, **kwargs)
+
+    # pylint: disable=C0103
+    def do_GET(self):
+        """Dispatches GET requests to the matching route"""
+        url = urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        github = self.server.github
+        with github.lock:
+            github.requests.append(self.path)
+            throttled = github.throttled > 0
+            github.throttled -= throttled
+        if throttled:
+            self._send_empty(
+                github.throttle_status,
+                headers={"Retry-After": str(github.retry_after)},
+            )
+            return
+        for pattern, name in self.routes:
+            match = re.fullmatch(pattern, url.path)
+            if match:
+                getattr(self, f"_{name}")(**match.groupdict())
+                return
+        self._send_empty(404)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """Keeps the test output quiet"""
+
+    def _runs(self, workflow=None):
+        def matches(run):
+            return (
+                self.query.get("branch") in (None, run.get("head_branch"))
+                and self.query.get("event") in (None, run.get("event"))
+                and self.query.get("status")
+                in (None, run.get("status"), run.get("conclusion"))
+                and workflow
+                in (
+                    None,
+                    str(run.get("workflow_id")),
+                    run.get("path", "").split("/")[-1],
+                )
+            )
+
+        runs = [run for run in self.server.github.runs if matches(run)]
+        self._send_page(runs, key="workflow_runs")
+
+    def _run_artifacts(self, run_id):
+        artifacts = self.server.github.run_artifacts.get(int(run_id), [])
+        self._send_page(artifacts, key="artifacts")
+
+    def _releases(self):
+        self._send_page(self.server.github.releases)
+
+    def _package_versions(self, package_type, package_name):
+        versions = self.server.github.packages.get((package_type, package_name))
+        if versions is None:
+            self._send_empty(404)
+            return
+        self._send_page(versions)
+
+    def _artifact(self, artifact_id):
+        payload = self.server.github.artifacts.get(int(artifact_id))
+        if payload is None:
+            self._send_empty(404)
+            return
+        github = self.server.github
+        start = 0
+        match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if match and github.ranges:
+            start = int(match.group(1))
+            if start >= len(payload):
+                self._send_empty(416)
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(payload) - 1}/{len(payload)}"
+            )
+        else:
+            self.send_response(200)
+        self._send_rate_limit_headers()
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(payload) - start))
+        self.end_headers()
+        end = len(payload)
+        with github.lock:
+            interrupted = github.interrupted > 0
+            github.interrupted -= interrupted
+            stalled = not interrupted and github.stalled > 0
+            github.stalled -= stalled
+        if interrupted or stalled:
+            # drop the connection halfway, after a silence when stalled
+            end = start + (end - start) // 2
+            self.close_connection = True
+        view = memoryview(payload)
+        for offset in range(start, end, MAX_CHUNK_SIZE):
+            self.wfile.write(view[offset : min(offset + MAX_CHUNK_SIZE, end)])
+            if github.chunk_delay:
+                time.sleep(github.chunk_delay)
+        if stalled:
+            time.sleep(STALL_SECONDS)
+
+    def _send_page(self, items, key=None):
+        """Sends one page of items, with a ``Link`` header to the next one"""
+        per_page = int(self.query.get("per_page", 30))
+        page = int(self.query.get("page", 1))
+        chunk = items[(page - 1) * per_page : page * per_page]
+        body = {"total_count": len(items), key: chunk} if key else chunk
+        headers = {}
+        if page * per_page < len(items):
+            query = urlencode({**self.query, "page": page + 1})
+            next_url = f"{self.server.github.url}{urlsplit(self.path).path}?{query}"
+            headers["Link"] = f'<{next_url}>; rel="next"'
+        self._send_json(body, headers=headers)
+
+    def _send_json(self, body, status=200, headers=None):
+        payload = json.dumps(body).encode()
+        etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.github.not_modified += 1
+            self._send_empty(304)
+            return
+        self.send_response(status)
+        self._send_rate_limit_headers()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        self._send_rate_limit_headers()
+        self.send_header("Content-Length", "0")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _send_rate_limit_headers(self):
+        github = self.server.github
+        remaining = max(github.rate_limit - len(github.requests), 0)
+        self.send_header("X-RateLimit-Limit", str(github.rate_limit))
+        self.send_header("X-RateLimit-Remaining", str(remaining))
+        self.send_header("X-RateLimit-Reset", str(int(github.rate_limit_reset)))
+
+
+# one attribute per fake behavior, plus the server and the recorded requests
+# pylint: disable=R0902
+class FakeGithub:
+    """Fake GitHub API server running in a background thread
+
+    Usage::
+
+        with FakeGithub(artifacts={1: zip_bytes}) as github:
+            api = GithubApi(token="fake", owner="o", repo="r", url=github.url)
+    """
+
+    # pylint: disable=R0913
+    def __init__(
+        self,
+        artifacts=None,
+        runs=None,
+        run_artifacts=None,
+        packages=None,
+        releases=None,
+        rate_limit=5000,
+        throttled=0,
+        retry_after=0,
+        throttle_status=429,
+        interrupted=0,
+        stalled=0,
+        ranges=True,
+        chunk_delay=0.0,
+    ):
+        """Default constructor
+
+        :param artifacts: Artifact payloads by artifact ID
+        :type artifacts: dict
+        :param runs: Workflow runs, most recent first
+        :type runs: list
+        :param run_artifacts: Artifact descriptions by run ID
+        :type run_artifacts: dict
+        :param packages: Package versions, most recent first, by
+            ``(package_type, package_name)``
+        :type packages: dict
+        :param releases: Releases, most recent first
+        :type releases: list
+        :param rate_limit: Requests allowed until the rate limit reset
+        :type rate_limit: int
+        :param throttled: Number of next requests to reject
+        :type throttled: int
+        :param retry_after: ``Retry-After`` of the rejected requests
+        :type retry_after: int
+        :param throttle_status: Status of the rejected requests
+        :type throttle_status: int
+        :param interrupted: Number of next artifact downloads to cut halfway
+        :type interrupted: int
+        :param stalled: Number of next artifact downloads to stall halfway,
+            for ``STALL_SECONDS``
+        :type stalled: int
+        :param ranges: Whether artifact downloads support ``Range``
+        :type ranges: bool
+        :param chunk_delay: Seconds to wait after each chunk of an artifact,
+            to simulate a slow link
+        :type chunk_delay: float
+        """
+        self.artifacts = artifacts or {}
+        self.runs = runs or []
+        self.run_artifacts = run_artifacts or {}
+        self.packages = packages or {}
+        self.releases = releases or []
+        # paths of all the requests served, for assertions
+        self.requests = []
+        self.not_modified = 0
+        self.rate_limit = rate_limit
+        self.rate_limit_reset = time.time() + 3600
+        self.throttled = throttled
+        self.retry_after = retry_after
+        self.throttle_status = throttle_status
+        self.interrupted = interrupted
+        self.stalled = stalled
+        self.ranges = ranges
+        self.chunk_delay = chunk_delay
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGithubHandler)
+        self._server.daemon_threads = True
+        self._server.github = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        """Base URL of the fake API"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,128 @@
+"""
+GitHub Helpers rate limit module
+
+Paces outgoing requests so that parallel downloads and lookups stay under
+GitHub primary and secondary rate limits instead of burning their retries.
+"""
+
+import threading
+import time
+
+
+def is_rate_limited(resp):
+    """Tells if a response was rejected by a GitHub rate limit.
+
+    :param resp: Response from the API.
+    :type resp: requests.Response
+    """
+    if resp.status_code not in (403, 429):
+        return False
+    return resp.status_code == 429 or (
+        "Retry-After" in resp.headers
+        or resp.headers.get("X-RateLimit-Remaining") == "0"
+    )
+
+
+# settings, injected clock and bucket state, all guarded by one lock
+# pylint: disable=R0902
+class RateLimiter:
+    """Token bucket shared by all the threads using a GithubApi client
+
+    Requests are let through at ``rate`` per second with bursts of up to
+    ``burst`` requests. The budget is then adjusted from the response
+    headers:
+
+    * ``Retry-After`` blocks every request until the given delay is over,
+    * ``X-RateLimit-Remaining`` equal to 0 blocks until ``X-RateLimit-Reset``,
+    * below ``reserve`` remaining requests, the rest of the budget is spread
+      evenly until the reset.
+    """
+
+    # pylint: disable=R0913
+    def __init__(self, rate=10.0, burst=20, reserve=100, clock=time.time, sleep=None):
+        """Initialize the limiter.
+
+        :param rate: Sustained requests per second.
+        :param burst: Maximum number of requests sent back to back.
+        :param reserve: Remaining requests below which pacing slows down.
+        :param clock: Function returning the current epoch time.
+        :param sleep: Function sleeping for a number of seconds.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self._clock = clock
+        self._sleep = sleep or time.sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._current_rate = rate
+        self._updated = self._clock()
+        self._blocked_until = 0.0
+
+    def __repr__(self):
+        return f"RateLimiter(rate={self.rate}, burst={self.burst})"
+
+    def acquire(self):
+        """Wait until a request may be sent."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            # take the token now, a negative balance is paid back by waiting
+            self._tokens -= 1
+            ready = max(self._updated, now)
+            if self._tokens < 0:
+                ready += -self._tokens / self._current_rate
+        if ready > now:
+            self._sleep(ready - now)
+        # a rate limit hit by another thread meanwhile applies to us too
+        while True:
+            wait = self._blocked_until - self._clock()
+            if wait < 1e-3:
+                return
+            self._sleep(wait)
+
+    def block(self, seconds):
+        """Hold every request for some time.
+
+        :param seconds: Delay from now.
+        """
+        with self._lock:
+            now = self._clock()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, self._blocked_until)
+
+    def update(self, headers):
+        """Adjust the budget to the rate limit headers of a response.
+
+        :param headers: Response headers.
+        :type headers: requests.structures.CaseInsensitiveDict
+        """
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                self.block(float(retry_after))
+            except ValueError:
+                # HTTP-date form, GitHub only sends seconds
+                pass
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        remaining = int(remaining)
+        reset_in = max(float(reset) - self._clock(), 0.0)
+        if remaining == 0:
+            self.block(reset_in)
+            return
+        with self._lock:
+            self._refill(self._clock())
+            if remaining < self.reserve and reset_in > 0:
+                self._current_rate = min(self.rate, remaining / reset_in)
+            else:
+                self._current_rate = self.rate
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self._current_rate)
+            self._updated = now
@@ -0,0 +1,105 @@
+"""
+GitHub Helpers statistics module
+
+``GithubApi`` clients call their hooks with an event name and keyword data:
+
+* ``request``: ``url``, ``status``, ``elapsed`` seconds until the response
+  headers, ``retries`` done by the connection pool, ``rate_limited`` and
+  ``rate_limit_remaining``, for every request sent,
+* ``transfer``: ``url``, ``size`` in bytes and ``elapsed`` seconds, for
+  every streamed download,
+* ``cache`` and ``artifact_cache``: ``hit``, for every lookup in the
+  response and artifact caches.
+
+No hook is installed by default, then events are not even built.
+"""
+
+import threading
+
+
+class RequestStats:
+    """Hook aggregating the events of a client into a summary
+
+    Usage::
+
+        stats = RequestStats()
+        api = GithubApi(token=token, owner=owner, repo=repo, hooks=[stats])
+        ...
+        print(json.dumps(stats.summary()))
+    """
+
+    def __init__(self):
+        self.counts = {"requests": 0, "errors": 0, "retries": 0, "rate_limited": 0}
+        self.latency = {"total": 0.0, "max": 0.0}
+        self.transfer = {"bytes": 0, "seconds": 0.0}
+        self.rate_limit_remaining = None
+        self.cache = {"hits": 0, "misses": 0}
+        self.artifact_cache = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"RequestStats(requests={self.counts['requests']}, "
+            f"bytes={self.transfer['bytes']})"
+        )
+
+    def __call__(self, event, **data):
+        handler = getattr(self, f"_on_{event}", None)
+        if handler:
+            with self._lock:
+                handler(**data)
+
+    def summary(self):
+        """Statistics collected so far, as a JSON serializable dict."""
+        with self._lock:
+            requests = self.counts["requests"]
+            mean = self.latency["total"] / requests if requests else 0.0
+            throughput = (
+                self.transfer["bytes"] / self.transfer["seconds"] / 2**20
+                if self.transfer["seconds"]
+                else 0.0
+            )
+            return {
+                **self.counts,
+                "latency_seconds": {
+                    "total": round(self.latency["total"], 6),
+                    "mean": round(mean, 6),
+                    "max": round(self.latency["max"], 6),
+                },
+                "bytes": self.transfer["bytes"],
+                "transfer_seconds": round(self.transfer["seconds"], 6),
+                "throughput_mib_per_second": round(throughput, 3),
+                "rate_limit_remaining": self.rate_limit_remaining,
+                "cache": dict(self.cache),
+                "artifact_cache": dict(self.artifact_cache),
+            }
+
+    # pylint: disable=W0613,R0913
+    def _on_request(
+        self, url, status, elapsed, retries, rate_limited, rate_limit_remaining
+    ):
+        self.counts["requests"] += 1
+        self.counts["retries"] += retries
+        if rate_limited:
+            self.counts["rate_limited"] += 1
+        if status >= 400:
+            self.counts["errors"] += 1
+        self.latency["total"] += elapsed
+        self.latency["max"] = max(self.latency["max"], elapsed)
+        if rate_limit_remaining is not None:
+            self.rate_limit_remaining = (
+                rate_limit_remaining
+                if self.rate_limit_remaining is None
+                else min(self.rate_limit_remaining, rate_limit_remaining)
+            )
+
+    # pylint: disable=W0613
+    def _on_transfer(self, url, size, elapsed):
+        self.transfer["bytes"] += size
+        self.transfer["seconds"] += elapsed
+
+    def _on_cache(self, hit):
+        self.cache["hits" if hit else "misses"] += 1
+
+    def _on_artifact_cache(self, hit):
+        self.artifact_cache["hits" if hit else "misses"] += 1
@@ -0,0 +1,203 @@
+"""Testing module for GitHub helpers API"""
+
+import hashlib
+import io
+import os
+import time
+
+import pytest
+import requests
+
+# pylint: disable=E0402
+from . import api as api_module
+from .api import MAX_CHUNK_SIZE, GithubApi, GithubError, extract_zip
+from .fake_github import STALL_SECONDS, make_zip
+
+
+def test_extract_zip_selected_members(tmp_path):
+    """Only members matching the patterns are written"""
+    archive = make_zip(
+        {
+            "app-debug.apk": b"apk",
+            "libs/agent.jar": b"jar",
+            "reports/index.html": b"html",
+        }
+    )
+    extracted = extract_zip(
+        io.BytesIO(archive), str(tmp_path), members=["*.jar", "*.apk"]
+    )
+    assert sorted(extracted) == sorted(
+        [str(tmp_path / "app-debug.apk"), str(tmp_path / "libs/agent.jar")]
+    )
+    assert not (tmp_path / "reports").exists()
+
+
+def test_extract_zip_all_members(tmp_path):
+    """All members are written when no pattern is given"""
+    archive = make_zip({"a.txt": b"a", "b/c.txt": b"c"})
+    extract_zip(io.BytesIO(archive), str(tmp_path))
+    assert (tmp_path / "a.txt").read_bytes() == b"a"
+    assert (tmp_path / "b/c.txt").read_bytes() == b"c"
+
+
+def test_download_large_file(tmp_path, fake_api):
+    """Download spanning several chunks is written byte for byte"""
+    payload = os.urandom(3 * MAX_CHUNK_SIZE + 123)
+    _, api = fake_api(artifacts={7: payload})
+    path = api.download_artifact(7, destdir=str(tmp_path), unzip=False)
+    with open(path, "rb") as downloaded:
+        assert downloaded.read() == payload
+
+
+def test_download_artifact_unzip(tmp_path, fake_api):
+    """Artifact is extracted and the archive is not kept"""
+    archive = make_zip({"app-debug.apk": b"apk", "mapping.txt": b"map"})
+    _, api = fake_api(artifacts={7: archive})
+    api.download_artifact(7, destdir=str(tmp_path), members=["*.apk"])
+    assert os.listdir(tmp_path) == ["app-debug.apk"]
+
+
+def test_iter_workflow_runs_is_lazy(fake_api):
+    """Pages are fetched only when the caller needs them"""
+    runs = [{"id": i, "head_branch": "main"} for i in range(250)]
+    github, api = fake_api(runs=runs)
+    first = next(api.iter_workflow_runs("main"))
+    assert first["id"] == 0
+    assert len(github.requests) == 1
+    all_runs = api.get_workflow_runs("main", limit=250)
+    assert len(github.requests) == 4
+    assert [run["id"] for run in all_runs["workflow_runs"]] == list(range(250))
+    assert all("per_page=100" in path for path in github.requests)
+
+
+def test_get_workflow_runs_defaults_to_first_page(fake_api):
+    """Without a limit, one page is fetched and GitHub's total is kept"""
+    runs = [{"id": i} for i in range(250)]
+    github, api = fake_api(runs=runs)
+    first_page = api.get_workflow_runs()
+    assert len(github.requests) == 1
+    first_runs = api.get_workflow_runs(limit=5)
+    assert first_page == {"total_count": 250, "workflow_runs": runs[:30]}
+    assert first_runs == {"total_count": 250, "workflow_runs": runs[:5]}
+
+
+def test_interrupted_download_is_resumed(tmp_path, fake_api):
+    """Dropped connections resume with Range and the digest still matches"""
+    payload = os.urandom(2 * MAX_CHUNK_SIZE + 17)
+    sha256 = hashlib.sha256(payload).hexdigest()
+    github, api = fake_api(artifacts={7: payload}, interrupted=2)
+    path = api.download_artifact(
+        7, destdir=str(tmp_path), unzip=False, sha256=f"sha256:{sha256}"
+    )
+    assert len(github.requests) == 3
+    with open(path, "rb") as downloaded:
+        assert downloaded.read() == payload
+    assert os.listdir(tmp_path) == ["download.zip"]
+
+
+@pytest.mark.parametrize("ranges", [True, False])
+def test_leftover_part_file_is_resumed(tmp_path, ranges, fake_api):
+    """A .part file from a killed run is completed, zero padding excluded"""
+    payload = os.urandom(1000) + b"\0" * 10 + os.urandom(1000)
+    (tmp_path / "art.zip.7.part").write_bytes(payload[:1005] + b"\0" * 500)
+    _, api = fake_api(artifacts={7: payload}, ranges=ranges)
+    path = api.download_artifact(
+        7,
+        destdir=str(tmp_path),
+        filename="art.zip",
+        unzip=False,
+        sha256=hashlib.sha256(payload).hexdigest(),
+    )
+    with open(path, "rb") as downloaded:
+        assert downloaded.read() == payload
+
+
+def test_part_file_of_another_artifact_is_not_resumed(tmp_path, fake_api):
+    """A .part file left over by an artifact of the same name is ignored"""
+    payload = os.urandom(2000)
+    (tmp_path / "art.zip.6.part").write_bytes(os.urandom(1000))
+    _, api = fake_api(artifacts={7: payload})
+    path = api.download_artifact(
+        7, destdir=str(tmp_path), filename="art.zip", unzip=False
+    )
+    with open(path, "rb") as downloaded:
+        assert downloaded.read() == payload
+
+
+def test_stalled_download_is_resumed(tmp_path, monkeypatch, fake_api):
+    """A connection sending nothing times out and the download resumes"""
+    monkeypatch.setattr(api_module, "READ_TIMEOUT", 0.2)
+    payload = os.urandom(2 * MAX_CHUNK_SIZE)
+    github, api = fake_api(artifacts={7: payload}, stalled=1)
+    started = time.monotonic()
+    path = api.download_artifact(7, destdir=str(tmp_path), unzip=False)
+    # resumed without waiting for the server to drop the connection
+    assert time.monotonic() - started < STALL_SECONDS
+    assert len(github.requests) == 2
+    with open(path, "rb") as downloaded:
+        assert downloaded.read() == payload
+
+
+def test_download_failing_every_attempt_raises(tmp_path, fake_api):
+    """No file is reported when every resume attempt is cut short"""
+    payload = os.urandom(2 * MAX_CHUNK_SIZE)
+    _, api = fake_api(artifacts={7: payload}, interrupted=20, ranges=False)
+    with pytest.raises(GithubError):
+        api.download_artifact(7, destdir=str(tmp_path), unzip=False)
+    assert not (tmp_path / "download.zip").exists()
+
+
+def test_missing_artifact_leaves_no_part_file(tmp_path, fake_api):
+    """A 404 does not leave an empty .part file behind"""
+    _, api = fake_api()
+    with pytest.raises(requests.HTTPError):
+        api.download_artifact(7, destdir=str(tmp_path), unzip=False)
+    assert not os.listdir(tmp_path)
+
+
+def test_checksum_mismatch(tmp_path, fake_api):
+    """A corrupted download is rejected and removed"""
+    _, api = fake_api(artifacts={7: b"corrupted"}, ranges=False)
+    with pytest.raises(GithubError):
+        api.download_artifact(7, destdir=str(tmp_path), unzip=False, sha256="0" * 64)
+    assert not os.listdir(tmp_path)
+
+
+def test_find_latest_run_artifacts(fake_api):
+    """Filters are sent to GitHub and artifacts are looked up in batches"""
+    runs = [
+        {
+            "id": i,
+            "head_branch": "main",
+            "event": "push",
+            "status": "completed",
+            "conclusion": "failure" if i % 3 else "success",
+            "path": ".github/workflows/build.yml" if i < 40 else "lint.yml",
+        }
+        for i in range(60)
+    ]
+    run_artifacts = {
+        21: [{"id": 210, "name": "app"}],
+        45: [{"id": 450, "name": "lint"}],
+    }
+    github, api = fake_api(runs=runs, run_artifacts=run_artifacts)
+    wf_artifacts = api.find_latest_run_artifacts(
+        batch_size=4, branch="main", status="success", workflow="build.yml"
+    )
+    # 1 listing + 2 batches of artifacts for runs 0, 3, ..., 21
+    assert len(github.requests) == 1 + 8
+    assert not api.find_latest_run_artifacts(event="pull_request")
+    assert wf_artifacts["artifacts"] == run_artifacts[21]
+
+
+def test_set_pool_size_keeps_session():
+    """Resizing the pool keeps the session and one pool per host"""
+    api = GithubApi(token="fake", owner="o", repo="r")
+    session = api._session  # pylint: disable=W0212
+    old_adapter = session.get_adapter("https://api.github.com")
+    api.set_pool_size(32)
+    assert api._session is session  # pylint: disable=W0212
+    adapter = session.get_adapter("https://api.github.com")
+    assert adapter is not old_adapter
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == 32
+    assert adapter.poolmanager.pools._maxsize == 10  # pylint: disable=W0212
@@ -0,0 +1,42 @@
+"""Testing module for GitHub helpers artifact cache"""
+
+import hashlib
+import os
+
+# pylint: disable=E0402
+from .artifact_cache import ArtifactCache
+from .fake_github import make_zip
+
+
+def test_second_download_comes_from_cache(tmp_path, fake_api):
+    """Same artifact is downloaded once and then linked or extracted"""
+    archive = make_zip({"app-debug.apk": b"apk"})
+    sha256 = f"sha256:{hashlib.sha256(archive).hexdigest()}"
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    github, api = fake_api(
+        artifacts={7: archive}, api_options={"artifact_cache": cache}
+    )
+    for job in ("job1", "job2"):
+        os.makedirs(tmp_path / job)
+        api.download_artifact(7, destdir=str(tmp_path / job), sha256=sha256)
+    zip_path = api.download_artifact(
+        7, destdir=str(tmp_path), filename="app.zip", unzip=False, sha256=sha256
+    )
+    assert len(github.requests) == 1
+    assert (tmp_path / "job2" / "app-debug.apk").read_bytes() == b"apk"
+    with open(zip_path, "rb") as downloaded:
+        assert downloaded.read() == archive
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.bytes_from_cache == 2 * len(archive)
+
+
+def test_eviction_keeps_recent_entries(tmp_path):
+    """Least recently used archives are evicted first"""
+    cache = ArtifactCache(str(tmp_path), max_size=250)
+    for artifact_id in (1, 2, 3):
+        archive = tmp_path / cache.temp_name(artifact_id)
+        archive.write_bytes(b"x" * 100)
+        os.utime(cache.add(str(archive), artifact_id), (artifact_id, artifact_id))
+    assert cache.get(1) is None
+    assert cache.get(2) is not None
+    assert cache.get(3) is not None
@@ -0,0 +1,82 @@
+"""Testing module for GitHub helpers asynchronous API"""
+
+import asyncio
+import os
+
+import pytest
+
+# pylint: disable=E0402
+from .api import MAX_CHUNK_SIZE
+from .fake_github import FakeGithub, make_zip
+
+httpx = pytest.importorskip("httpx")
+
+# pylint: disable=C0413
+from .async_api import AsyncGithubApi
+
+
+def test_paginated_runs_and_artifacts():
+    """Pages are followed and limits stop the iteration early"""
+    runs = [{"id": i} for i in range(120)]
+    artifacts = {3: [{"id": 30, "name": "app"}]}
+
+    async def scenario(url):
+        async with AsyncGithubApi(token="fake", owner="o", repo="r", url=url) as api:
+            all_runs = await api.get_workflow_runs(limit=120)
+            first_runs = await api.get_workflow_runs(limit=5)
+            first_page = await api.get_workflow_runs()
+            run_artifacts = await api.get_workflow_artifacts(3)
+        return all_runs, first_runs, first_page, run_artifacts
+
+    with FakeGithub(runs=runs, run_artifacts=artifacts) as github:
+        all_runs, first_runs, first_page, run_artifacts = asyncio.run(
+            scenario(github.url)
+        )
+    assert all_runs["workflow_runs"] == runs
+    assert first_runs == {"total_count": 120, "workflow_runs": runs[:5]}
+    assert first_page == {"total_count": 120, "workflow_runs": runs[:30]}
+    assert run_artifacts == {"total_count": 1, "artifacts": artifacts[3]}
+
+
+def test_concurrent_downloads_with_rate_limit(tmp_path):
+    """Concurrent downloads survive throttled requests"""
+    archives = {i: make_zip({f"art-{i}.txt": str(i)}) for i in range(4)}
+
+    async def scenario(url):
+        async with AsyncGithubApi(
+            token="fake", owner="o", repo="r", url=url, concurrency=4
+        ) as api:
+            return await asyncio.gather(
+                *(api.download_artifact(i, destdir=str(tmp_path)) for i in archives)
+            )
+
+    with FakeGithub(artifacts=archives, throttled=2) as github:
+        asyncio.run(scenario(github.url))
+    assert sorted(os.listdir(tmp_path)) == [f"art-{i}.txt" for i in range(4)]
+
+
+def test_concurrency_covers_whole_downloads(tmp_path):
+    """Downloads beyond the concurrency wait their turn, not for the pool"""
+    payloads = {i: os.urandom(2 * MAX_CHUNK_SIZE) for i in range(3)}
+
+    async def scenario(url):
+        async with AsyncGithubApi(
+            token="fake", owner="o", repo="r", url=url, concurrency=1, retries=0
+        ) as api:
+            # a download queued on the connection pool would time out
+            # pylint: disable=W0212
+            api._client.timeout = httpx.Timeout(30.0, pool=0.05)
+            return await asyncio.gather(
+                *(
+                    api.download_artifact(
+                        i, destdir=str(tmp_path), filename=f"{i}.zip", unzip=False
+                    )
+                    for i in payloads
+                )
+            )
+
+    with FakeGithub(artifacts=payloads, chunk_delay=0.1) as github:
+        paths = asyncio.run(scenario(github.url))
+    for path, payload in zip(paths, payloads.values()):
+        with open(path, "rb") as downloaded:
+            assert downloaded.read() == payload
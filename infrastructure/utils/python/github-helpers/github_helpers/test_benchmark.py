@@ -0,0 +1,123 @@
+"""Benchmarks of GitHub helpers against the fake GitHub API
+
+Run with ``pytest github_helpers/test_benchmark.py``, or skip them with
+``--benchmark-skip``. Results can be compared between commits with
+``--benchmark-autosave`` and ``--benchmark-compare``.
+"""
+
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import pytest
+from click.testing import CliRunner
+
+# pylint: disable=E0402
+from .api import MAX_CHUNK_SIZE, SPOOL_MAX_SIZE
+from .cli import cli
+from .fake_github import make_large_zip
+from .ratelimit import RateLimiter
+
+pytest.importorskip("pytest_benchmark")
+
+DOWNLOAD_SIZE = 64 * 2**20
+ARCHIVE_SIZE = 96 * 2**20
+
+
+@pytest.fixture(name="large_archive", scope="module")
+def fixture_large_archive():
+    """Archive bigger than SPOOL_MAX_SIZE, built once"""
+    return make_large_zip(ARCHIVE_SIZE)
+
+
+def test_bench_download_throughput(benchmark, tmp_path, fake_api):
+    """Throughput of a plain archive download"""
+    _, api = fake_api(artifacts={1: os.urandom(DOWNLOAD_SIZE)})
+    path = benchmark.pedantic(
+        api.download_artifact,
+        args=(1,),
+        kwargs={"destdir": str(tmp_path), "unzip": False},
+        rounds=5,
+    )
+    assert os.path.getsize(path) == DOWNLOAD_SIZE
+    # no stats with --benchmark-disable
+    if benchmark.stats:
+        benchmark.extra_info["throughput_mib_per_second"] = (
+            DOWNLOAD_SIZE / benchmark.stats.stats.min / 2**20
+        )
+
+
+def test_bench_pagination_latency(benchmark, fake_api):
+    """Latency of listing 10 pages of workflow runs"""
+    runs = [{"id": i} for i in range(1000)]
+    # no pacing, to measure the requests themselves
+    unlimited = RateLimiter(rate=1e9, burst=10**9)
+    _, api = fake_api(runs=runs, api_options={"rate_limiter": unlimited})
+    listed = benchmark(api.get_workflow_runs, limit=len(runs))
+    assert listed["workflow_runs"] == runs
+
+
+# pylint: disable=R0913
+@pytest.mark.parametrize(
+    "resume,max_peak",
+    [(False, SPOOL_MAX_SIZE + 8 * MAX_CHUNK_SIZE), (True, 4 * MAX_CHUNK_SIZE)],
+    ids=["spooled", "resume"],
+)
+def test_bench_download_arts_peak_memory(
+    benchmark, tmp_path, fake_github, large_archive, resume, max_peak
+):
+    """Peak memory of download-arts does not grow with the archive size"""
+    github = fake_github(
+        runs=[
+            {
+                "id": 1,
+                "head_branch": "master",
+                "status": "completed",
+                "conclusion": "success",
+            }
+        ],
+        run_artifacts={1: [{"id": 7, "name": "app-debug"}]},
+        artifacts={7: large_archive},
+    )
+    args = ["--token", "fake", "--api-url", github.url, "download-arts"]
+    args += ["--dest-dir", str(tmp_path)] + (["--resume"] if resume else [])
+
+    def download_arts():
+        tracemalloc.start()
+        try:
+            result = CliRunner(mix_stderr=False).invoke(cli, args)
+            return result, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    result, peak = benchmark.pedantic(download_arts, rounds=1)
+    assert result.exit_code == 0, result.stderr
+    assert (tmp_path / "app-debug.apk").stat().st_size == ARCHIVE_SIZE
+    benchmark.extra_info["peak_memory_mib"] = peak / 2**20
+    assert peak < max_peak
+
+
+def test_bench_cli_import_time(benchmark):
+    """Startup cost of the CLI, from ``python -X importtime``"""
+
+    def import_cli():
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import github_helpers.cli"],
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # "import time: self [us] | cumulative | imported package"
+        return {
+            fields[2].strip(): int(fields[1])
+            for fields in (
+                line.removeprefix("import time:").split("|")
+                for line in result.stderr.splitlines()[1:]
+            )
+        }
+
+    imports = benchmark.pedantic(import_cli, rounds=5)
+    benchmark.extra_info["import_us"] = imports["github_helpers.cli"]
+    assert not {"requests", "urllib3", "asyncio"} & set(imports)
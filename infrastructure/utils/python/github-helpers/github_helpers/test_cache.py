@@ -0,0 +1,45 @@
+"""Testing module for GitHub helpers response cache"""
+
+import os
+
+# pylint: disable=E0402
+from .api import GithubApi
+from .cache import ResponseCache
+from .fake_github import FakeGithub
+
+
+def test_conditional_requests_are_served_from_cache(tmp_path):
+    """Second listing is revalidated with ETags and served locally"""
+    runs = [{"id": i} for i in range(150)]
+    cache = ResponseCache(str(tmp_path))
+    with FakeGithub(runs=runs) as github:
+        api = GithubApi(token="fake", owner="o", repo="r", url=github.url, cache=cache)
+        first = api.get_workflow_runs(limit=150)
+        assert (cache.hits, cache.misses) == (0, 2)
+        # a new client, as another CLI process sharing the directory would do
+        api = GithubApi(
+            token="fake",
+            owner="o",
+            repo="r",
+            url=github.url,
+            cache=ResponseCache(str(tmp_path)),
+        )
+        second = api.get_workflow_runs(limit=150)
+        assert (api.cache.hits, api.cache.misses) == (2, 0)
+        assert github.not_modified == 2
+    assert first == second
+
+
+def test_lru_eviction(tmp_path):
+    """Least recently used entries go first when the cache is full"""
+    cache = ResponseCache(str(tmp_path), max_size=10**9)
+    for key in ("a", "b", "c"):
+        cache.put(key, f'"{key}"', {"payload": "x" * 100})
+    for offset, key in enumerate(("a", "b", "c")):
+        os.utime(cache._path(key), (offset, offset))  # pylint: disable=W0212
+    cache.get("a")
+    cache.max_size = 2 * os.path.getsize(cache._path("a"))  # pylint: disable=W0212
+    cache.evict()
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
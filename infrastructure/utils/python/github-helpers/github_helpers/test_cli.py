@@ -1,38 +1,217 @@
 """Testing module for GitHub helpers"""
 
 import os
+import subprocess
+import sys
 
+import pytest
+import requests
 from click.testing import CliRunner
 
 # pylint: disable=E0402
+from .api import GithubApi
 from .cli import cli
+from .fake_github import make_zip
+from .versions import VersionIndex
 
 
-def test_download_arts_positive():
+@pytest.fixture(name="github")
+def fixture_github(fake_github):
+    """Fake GitHub API with a successful run of master having an APK"""
+    return fake_github(
+        runs=[
+            {
+                "id": 2,
+                "head_branch": "master",
+                "status": "completed",
+                "conclusion": "failure",
+            },
+            {
+                "id": 1,
+                "head_branch": "master",
+                "status": "completed",
+                "conclusion": "success",
+            },
+        ],
+        run_artifacts={1: [{"id": 7, "name": "app-debug"}]},
+        artifacts={7: make_zip({"app-debug.apk": b"apk"})},
+        packages={
+            ("maven", "io.iohk.atala.prism-identity"): [
+                {"name": "1.3.0"},
+                {"name": "1.4.0"},
+            ]
+        },
+    )
+
+
+def _invoke(github, args):
+    runner = CliRunner(mix_stderr=False)
+    return runner.invoke(cli, ["--token", "fake", "--api-url", github.url] + args)
+
+
+def test_download_arts_positive(tmp_path, github):
     """Download arts test"""
-    runner = CliRunner()
-    result = runner.invoke(
-        cli, ["download-arts", "--branch", "master", "--run-id", "latest"]
+    result = _invoke(
+        github,
+        ["download-arts", "--branch", "master", "--run-id", "latest"]
+        + ["--dest-dir", str(tmp_path)],
     )
     assert result.exit_code == 0, "Error during download-arts command"
-    if not os.path.exists("app-debug.apk"):
-        assert False, "Application was not downloaded!"
-    else:
-        os.remove("app-debug.apk")
+    assert (tmp_path / "app-debug.apk").exists(), "Application was not downloaded!"
 
 
-def test_download_arts_negative():
+def test_download_arts_negative(tmp_path, github):
     """Negative test for arts downloading"""
-    runner = CliRunner()
-    result = runner.invoke(
-        cli, ["download-arts", "--branch", "master", "--run-id", "never-exist"]
+    result = _invoke(
+        github,
+        ["download-arts", "--branch", "master", "--run-id", "never-exist"]
+        + ["--dest-dir", str(tmp_path)],
     )
     assert result.exit_code == 1, "Arts downloaded but not exist!"
+    assert isinstance(result.exception, SystemExit), "Unhandled listing error"
+    assert "Unable to list artifacts for run_id='never-exist'" in result.stderr
 
 
-def test_get_latest_version():
+def test_get_latest_version(github):
     """Latest version test"""
-    runner = CliRunner()
-    result = runner.invoke(cli, ["get-latest-package-version"])
+    result = _invoke(github, ["get-latest-package-version"])
     assert result.exit_code == 0, "Unable to get latest package version!"
-    assert result.output != "", "Latest version cannot be empty string!"
+    assert result.stdout == "1.4.0\n", "Latest version is not the highest one!"
+
+
+def test_get_latest_version_missing_package(github):
+    """Unknown package is reported as an error"""
+    result = _invoke(github, ["get-latest-package-version", "--package", "nope"])
+    assert result.exit_code != 0
+
+
+def test_download_arts_parallel_reports_failures(monkeypatch, tmp_path):
+    """Parallel download keeps going when one of the artifacts fails"""
+    artifacts = [{"id": i, "name": f"art-{i}"} for i in range(6)]
+    downloaded = []
+
+    def fake_artifacts(_self, _run_id):
+        return iter(artifacts)
+
+    def fake_download(_self, artifact_id, destdir=None, filename=None, **_kwargs):
+        if artifact_id == 3:
+            raise requests.HTTPError("410 Client Error: Gone")
+        downloaded.append(filename)
+        return f"{destdir}/{filename}"
+
+    monkeypatch.setattr(GithubApi, "iter_workflow_artifacts", fake_artifacts)
+    monkeypatch.setattr(GithubApi, "download_artifact", fake_download)
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["--token", "fake", "download-arts", "--run-id", "1", "--jobs", "4"]
+        + ["--dest-dir", str(tmp_path)],
+    )
+    assert result.exit_code == 1, "Failed artifact must fail the command"
+    assert sorted(downloaded) == [f"art-{i}.zip" for i in (0, 1, 2, 4, 5)]
+
+
+def test_get_latest_package_versions_batch(monkeypatch, tmp_path):
+    """Many packages are resolved in one invocation"""
+    versions = {
+        ("prism-identity", "maven"): VersionIndex(["1.4.0", "1.10.0-RC1", "1.9.2"]),
+        ("identus-cloud-agent", "container"): VersionIndex(["latest", "1.38.0"]),
+        ("prism-node", "maven"): VersionIndex([]),
+    }
+
+    def fake_index(_self, package_name, package_type="maven", **_kwargs):
+        return versions[(package_name, package_type)]
+
+    monkeypatch.setattr(GithubApi, "get_package_version_index", fake_index)
+    packages_file = tmp_path / "packages.txt"
+    packages_file.write_text("# name type\nidentus-cloud-agent container\n")
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(
+        cli,
+        ["--token", "fake", "get-latest-package-versions", "prism-identity"]
+        + ["prism-node:maven", "--file", str(packages_file), "--format", "tsv"]
+        + ["--exclude-prerelease"],
+    )
+    assert result.exit_code == 2, "Unresolved package must fail the command"
+    assert result.stdout.splitlines() == [
+        "prism-identity\tmaven\t1.9.2",
+        "prism-node\tmaven\t",
+        "identus-cloud-agent\tcontainer\t1.38.0",
+    ]
+
+
+def test_get_latest_release_version_prefix(monkeypatch):
+    """Latest release is the highest semver among the prefixed tags"""
+    index = VersionIndex(
+        ["cloud-agent-v1.40.0-rc.1", "prism-agent-v1.99.0", "cloud-agent-v1.39.1"]
+    )
+    monkeypatch.setattr(
+        GithubApi, "get_release_version_index", lambda _self, **_kwargs: index
+    )
+    runner = CliRunner(mix_stderr=False)
+    args = ["--token", "fake", "get-latest-release-version"]
+    args += ["--prefix", "cloud-agent-v"]
+    result = runner.invoke(cli, args)
+    assert result.stdout == "cloud-agent-v1.40.0-rc.1\n"
+    result = runner.invoke(cli, args + ["--exclude-prerelease"])
+    assert result.stdout == "cloud-agent-v1.39.1\n"
+
+
+def test_get_latest_release_version_lists_all_pages(fake_github):
+    """Only --first-match may stop listing before a higher version"""
+    releases = [{"tag_name": f"0.0.{i}"} for i in range(100, 0, -1)]
+    github = fake_github(releases=releases + [{"tag_name": "1.0.0"}])
+    result = _invoke(github, ["get-latest-release-version"])
+    assert result.stdout == "1.0.0\n"
+    result = _invoke(github, ["get-latest-release-version", "--first-match"])
+    assert result.stdout == "0.0.100\n"
+
+
+def test_help_does_not_load_api():
+    """--help of a command neither imports requests nor opens a session"""
+    code = (
+        "import sys\n"
+        "from github_helpers.cli import cli\n"
+        "try:\n"
+        "    cli(['--token', 'fake', 'download-arts', '--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted({'requests', 'urllib3'} & set(sys.modules)))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[-1] == "[]"
+
+
+def test_download_arts_async_rejects_resume():
+    """--resume cannot be honored by --async downloads"""
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(
+        cli, ["--token", "fake", "download-arts", "--async", "--resume"]
+    )
+    assert result.exit_code == 2
+    assert "--resume is not supported with --async" in result.stderr
+
+
+def test_download_arts_reports_interrupted_download(tmp_path, fake_github):
+    """A connection dropped mid-download fails only that artifact"""
+    github = fake_github(
+        runs=[{"id": 1, "head_branch": "master", "status": "completed"}],
+        run_artifacts={1: [{"id": i, "name": f"art-{i}"} for i in range(3)]},
+        artifacts={i: make_zip({f"art-{i}.txt": b"x" * 100_000}) for i in range(3)},
+        interrupted=1,
+    )
+    result = _invoke(
+        github,
+        ["download-arts", "--run-id", "1", "--jobs", "1"]
+        + ["--dest-dir", str(tmp_path)],
+    )
+    assert result.exit_code == 1, "Interrupted artifact must fail the command"
+    assert isinstance(result.exception, SystemExit), "Unhandled download error"
+    assert "Unable to download artifact 'art-" in result.stderr
+    assert len(list(tmp_path.glob("art-*.txt"))) == 2
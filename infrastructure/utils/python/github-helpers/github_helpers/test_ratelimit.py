@@ -0,0 +1,89 @@
+"""Testing module for GitHub helpers rate limiting"""
+
+import pytest
+
+# pylint: disable=E0402
+from .ratelimit import RateLimiter
+
+
+class FakeClock:
+    """Clock advanced by the limiter sleeps only"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        """Advances the clock"""
+        self.now += seconds
+
+
+def test_token_bucket_paces_after_burst():
+    """Requests past the burst are spaced by the rate"""
+    clock = FakeClock()
+    limiter = RateLimiter(rate=5, burst=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.now == 1_000_000.0
+    for _ in range(5):
+        limiter.acquire()
+    assert abs(clock.now - 1_000_001.0) < 1e-6
+
+
+def test_retry_after_blocks_all_requests():
+    """Retry-After holds back the next request for the whole delay"""
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.update({"Retry-After": "30"})
+    limiter.acquire()
+    assert clock.now >= 1_000_030.0
+
+
+def test_exhausted_rate_limit_waits_for_reset():
+    """No request is sent before the reset once the budget is spent"""
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    limiter.update(
+        {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(clock.now) + 120)}
+    )
+    limiter.acquire()
+    assert clock.now >= 1_000_120.0
+
+
+def test_low_budget_is_spread_until_reset():
+    """Few remaining requests are spaced evenly until the reset"""
+    clock = FakeClock()
+    limiter = RateLimiter(rate=10, burst=1, clock=clock, sleep=clock.sleep)
+    limiter.update(
+        {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(int(clock.now) + 100)}
+    )
+    limiter.acquire()
+    limiter.acquire()
+    assert abs(clock.now - 1_000_010.0) < 1e-6
+
+
+def test_rate_limited_requests_are_retried(fake_api):
+    """429 responses from the server are retried through the limiter"""
+    runs = [{"id": 1}]
+    github, api = fake_api(runs=runs, throttled=2)
+    assert api.get_workflow_runs()["workflow_runs"] == runs
+    assert len(github.requests) == 3
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retry_after_blocks_the_shared_limiter(status, fake_api):
+    """Retry-After is waited for by the limiter, not in the calling thread"""
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock, sleep=clock.sleep)
+    github, api = fake_api(
+        runs=[{"id": 1}],
+        throttled=1,
+        retry_after=30,
+        throttle_status=status,
+        api_options={"rate_limiter": limiter},
+    )
+    api.get_workflow_runs()
+    assert len(github.requests) == 2
+    assert clock.now >= 1_000_030.0
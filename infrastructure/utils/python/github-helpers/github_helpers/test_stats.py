@@ -0,0 +1,60 @@
+"""Testing module for GitHub helpers instrumentation hooks"""
+
+import json
+
+from click.testing import CliRunner
+
+# pylint: disable=E0402
+from .api import GithubApi
+from .cli import cli
+from .stats import RequestStats
+from .versions import VersionIndex
+
+
+def test_hooks_receive_requests_and_transfers(tmp_path, fake_api):
+    """Latency, retries, bytes and rate limit are reported to the hooks"""
+    payload = b"x" * 300_000
+    events = []
+    stats = RequestStats()
+
+    def record(event, **_data):
+        events.append(event)
+
+    _, api = fake_api(
+        artifacts={7: payload},
+        runs=[{"id": i} for i in range(150)],
+        throttled=1,
+        api_options={"hooks": [stats, record]},
+    )
+    api.get_workflow_runs(limit=150)
+    api.download_artifact(7, destdir=str(tmp_path), unzip=False)
+    summary = stats.summary()
+    assert events.count("transfer") == 1
+    assert summary["requests"] == events.count("request") == 4
+    assert summary["rate_limited"] == 1
+    assert summary["retries"] == 0
+    assert summary["bytes"] == len(payload)
+    assert summary["throughput_mib_per_second"] > 0
+    assert summary["latency_seconds"]["max"] >= summary["latency_seconds"]["mean"]
+    assert summary["rate_limit_remaining"] is not None
+
+
+def test_no_hooks_by_default():
+    """Instrumentation is off unless hooks are given"""
+    assert not GithubApi(token="fake", owner="o", repo="r").hooks
+
+
+def test_cli_stats_json(monkeypatch):
+    """--stats json prints the summary to stderr, keeping stdout clean"""
+    monkeypatch.setattr(
+        GithubApi,
+        "get_release_version_index",
+        lambda _self, **_kwargs: VersionIndex(["1.0.0"]),
+    )
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(
+        cli, ["--token", "fake", "--stats", "json", "get-latest-release-version"]
+    )
+    assert result.exit_code == 0
+    assert result.stdout == "1.0.0\n"
+    assert json.loads(result.stderr)["requests"] == 0
@@ -0,0 +1,118 @@
+"""Testing module for GitHub helpers version index"""
+
+# pylint: disable=E0402
+from .api import GithubApi
+from .cache import ResponseCache
+from .versions import VersionIndex, parse_version
+
+
+def test_semver_ordering():
+    """Pre-releases sort before their release, numbers numerically"""
+    names = [
+        "1.10.0",
+        "1.9.0",
+        "v1.10.1-rc.2",
+        "1.10.1-RC10",
+        "1.10.1-SNAPSHOT",
+        "1.10.1-alpha",
+        "1.10.1",
+    ]
+    ordered = sorted(names, key=parse_version)
+    assert ordered == [
+        "1.9.0",
+        "1.10.0",
+        "1.10.1-alpha",
+        "v1.10.1-rc.2",
+        "1.10.1-RC10",
+        "1.10.1-SNAPSHOT",
+        "1.10.1",
+    ]
+    assert parse_version("latest") is None
+    assert parse_version("sha256:abc") is None
+
+
+def test_index_latest():
+    """Latest is the highest version matching the filters"""
+    index = VersionIndex(
+        ["latest", "2.0.0-SNAPSHOT", "1.2.0", "1.11.0", "agent-v3.0.0", "agent-v2.1.0"]
+    )
+    assert index.latest() == "2.0.0-SNAPSHOT"
+    assert index.latest(exclude_prerelease=True) == "1.11.0"
+    assert index.latest(prefix="agent-v") == "agent-v3.0.0"
+    assert index.latest(prefix="none-") is None
+    assert not VersionIndex([]).latest()
+    # a fourth number is part of the release, not a pre-release
+    assert VersionIndex(["1.2.3", "1.2.3.4"]).latest(exclude_prerelease=True) == (
+        "1.2.3.4"
+    )
+    # equal versions resolve to the most recent name
+    assert VersionIndex(["v1.2.0", "1.2.0"]).latest() == "v1.2.0"
+    assert VersionIndex(["1.2.0", "v1.2.0"]).latest() == "1.2.0"
+    assert VersionIndex(["a-v1.2.0", "a-1.2.0"]).latest(prefix="a-") == "a-v1.2.0"
+
+
+def test_index_is_built_once_and_cached(monkeypatch, tmp_path):
+    """Pages are fetched once, then the stored index is revalidated"""
+    pages = {
+        "u/repos/o/r/releases": (
+            [{"tag_name": "1.0.0", "assets": [{"download_count": 1}]}],
+            "u/page2",
+        ),
+        "u/page2": ([{"tag_name": "1.2.0"}, {"tag_name": "1.1.0"}], None),
+    }
+    requested = []
+
+    def fake_get_page(_self, request_url, params=None):  # pylint: disable=W0613
+        requested.append(request_url)
+        return pages[request_url]
+
+    monkeypatch.setattr(GithubApi, "_get_page", fake_get_page)
+    cache = ResponseCache(str(tmp_path))
+
+    def make_api():
+        return GithubApi(token="fake", owner="o", repo="r", url="u", cache=cache)
+
+    api = make_api()
+    assert api.get_release_version_index().latest() == "1.2.0"
+    assert api.get_release_version_index() is api.get_release_version_index()
+    assert requested == ["u/repos/o/r/releases", "u/page2"]
+
+    # another process: only the first page is checked, even if its other
+    # fields changed
+    requested.clear()
+    pages["u/repos/o/r/releases"][0][0]["assets"][0]["download_count"] = 2
+    assert make_api().get_release_version_index().latest() == "1.2.0"
+    assert requested == ["u/repos/o/r/releases"]
+
+    # a new release shows up on the first page
+    requested.clear()
+    pages["u/repos/o/r/releases"] = ([{"tag_name": "1.3.0"}], "u/page2")
+    assert make_api().get_release_version_index().latest() == "1.3.0"
+    assert requested == ["u/repos/o/r/releases", "u/page2"]
+
+
+def test_index_without_cache_stops_at_answer_on_request(monkeypatch):
+    """Without a cache, callers may stop listing once the filters find a version"""
+    pages = {
+        "u/repos/o/r/releases": ([{"tag_name": "2.0.0-rc.1"}], "u/page2"),
+        "u/page2": ([{"tag_name": "1.2.0"}], "u/page3"),
+        "u/page3": ([{"tag_name": "1.1.0"}], None),
+    }
+    requested = []
+
+    def fake_get_page(_self, request_url, params=None):  # pylint: disable=W0613
+        requested.append(request_url)
+        return pages[request_url]
+
+    monkeypatch.setattr(GithubApi, "_get_page", fake_get_page)
+    api = GithubApi(token="fake", owner="o", repo="r", url="u")
+    index = api.get_release_version_index(
+        until=lambda index: index.latest(exclude_prerelease=True) is not None
+    )
+    assert index.latest(exclude_prerelease=True) == "1.2.0"
+    assert requested == ["u/repos/o/r/releases", "u/page2"]
+
+    # without opting in, the whole index is listed
+    requested.clear()
+    assert len(api.get_release_version_index()) == 3
+    assert requested == ["u/repos/o/r/releases", "u/page2", "u/page3"]
@@ -0,0 +1,117 @@
+"""
+GitHub Helpers versions module
+
+Orders package and release versions by semantic version, so that "latest"
+means the highest version rather than the first one GitHub returns.
+"""
+
+import re
+
+VERSION_RE = re.compile(
+    r"v?(?P<major>\d+)\.(?P<minor>\d+)(?:\.(?P<patch>\d+))?(?:\.(?P<build>\d+))?"
+    r"(?:[-.]?(?P<pre>[0-9A-Za-z][0-9A-Za-z.-]*))?(?:\+[0-9A-Za-z.-]+)?"
+)
+RELEASE_PARTS = ("major", "minor", "patch", "build")
+
+
+def parse_version(name):
+    """Parses a version name into a sort key.
+
+    Accepts ``1.2.3``, ``v1.2``, ``1.2.3.4``, ``1.2.3-rc.1``, ``1.2.3-RC1``,
+    ``1.2.3-SNAPSHOT`` and build metadata like ``1.2.3+abc``. Pre-releases
+    sort before their release, their identifiers compare as in SemVer 2.0:
+    numbers numerically, below words compared case-insensitively.
+
+    :param name: Version name.
+    :returns: Tuple usable as a sort key, or None for non-version names.
+    """
+    match = VERSION_RE.fullmatch(name)
+    if not match:
+        return None
+    release = tuple(int(match.group(part) or 0) for part in RELEASE_PARTS)
+    pre = match.group("pre")
+    if not pre:
+        return release + (1, ())
+    identifiers = tuple(
+        (0, int(ident), "") if ident.isdigit() else (1, 0, ident.lower())
+        for ident in re.findall(r"\d+|[A-Za-z-]+", pre)
+    )
+    return release + (0, identifiers)
+
+
+def is_prerelease(key):
+    """Tells if a key from ``parse_version`` is a pre-release."""
+    return key[len(RELEASE_PARTS)] == 0
+
+
+def version_names(version, package_type=None):
+    """Gets the names of a package version or release.
+
+    :param version: Package version or release as returned by GitHub API.
+    :param package_type: Package type, None for releases.
+    :returns: Version names, all the tags for containers.
+    """
+    if package_type is None:
+        return [version["tag_name"]] if version.get("tag_name") else []
+    if package_type == "container":
+        return (version.get("metadata") or {}).get("container", {}).get("tags") or []
+    return [version["name"]] if version.get("name") else []
+
+
+class VersionIndex:
+    """Version names sorted by semantic version, highest first
+
+    Names which are not versions are kept apart. Answers to ``latest`` are
+    memoized, so repeated queries are dictionary lookups.
+    """
+
+    def __init__(self, names):
+        """Build the index.
+
+        :param names: Version names, most recent first.
+        """
+        self.names = list(names)
+        keyed = [(parse_version(name), name) for name in self.names]
+        # stable, so the most recent of equal versions comes first
+        self.sorted = sorted(
+            (item for item in keyed if item[0]),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        self._latest = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"VersionIndex({len(self.sorted)} versions of {len(self.names)} names)"
+
+    def latest(self, prefix="", exclude_prerelease=False):
+        """Get the highest version.
+
+        :param prefix: Only consider names starting with this prefix, which
+            is stripped before parsing, e.g. ``cloud-agent-v``.
+        :param exclude_prerelease: Skip pre-releases, RCs and snapshots.
+        :returns: Version name, or None.
+        """
+        query = (prefix, exclude_prerelease)
+        if query not in self._latest:
+            self._latest[query] = self._find_latest(prefix, exclude_prerelease)
+        return self._latest[query]
+
+    def _find_latest(self, prefix, exclude_prerelease):
+        if not prefix:
+            for key, name in self.sorted:
+                if not (exclude_prerelease and is_prerelease(key)):
+                    return name
+            return None
+        candidates = [
+            (key, name)
+            for key, name in (
+                (parse_version(name[len(prefix) :]), name)
+                for name in self.names
+                if name.startswith(prefix)
+            )
+            if key and not (exclude_prerelease and is_prerelease(key))
+        ]
+        return max(candidates, key=lambda item: item[0])[1] if candidates else None
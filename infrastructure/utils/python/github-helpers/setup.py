@@ -19,4 +19,8 @@ setup(
         "pytest==6.2.4",
         "pytest-cov==2.12.1",
     ],
+    extras_require={
+        "async": ["httpx==0.27.0"],
+        "bench": ["pytest-benchmark==3.4.1"],
+    },
 )